@@ -0,0 +1,251 @@
+from urllib.parse import urlparse
+import http.client
+import threading
+import itertools
+import random
+import heapq
+import queue
+import json
+import time
+
+# --- Configurações do Encaminhamento ---
+BATCH_WINDOW_SECONDS = 0.2     # Alertas recebidos dentro desta janela são enviados juntos em um único POST
+MAX_BATCH_SIZE = 100           # Máximo de alertas por POST
+MAX_QUEUED_ALERTS = 10000      # Fila de entrada; alertas além disso são descartados (e contados)
+MAX_PENDING_BATCHES = 1000     # Lotes pendentes/em retentativa por webhook; acima disso descarta o mais antigo
+CONNECTIONS_PER_WEBHOOK = 2    # Conexões keep-alive (e threads de envio) por webhook
+MAX_ATTEMPTS = 6               # Tentativas por lote antes de desistir
+BACKOFF_BASE_SECONDS = 0.5     # Espera antes da 2ª tentativa; dobra a cada falha
+BACKOFF_MAX_SECONDS = 30.0
+REQUEST_TIMEOUT_SECONDS = 5.0
+# ---------------------
+
+class ForwardingStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {
+            "submitted_alerts": 0,
+            "forwarded_alerts": 0,
+            "forwarded_batches": 0,
+            "retried_batches": 0,
+            "dropped_queue_full": 0,
+            "dropped_overflow": 0,
+            "dropped_failed": 0,
+            "connections_opened": 0,
+        }
+
+    def add(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+class WebhookDestination:
+    """
+    Um webhook de destino: uma fila de lotes ordenada pelo horário da próxima tentativa
+    (heap) e um pequeno pool de threads, cada uma com sua própria conexão keep-alive.
+    """
+
+    def __init__(self, url, stats):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise ValueError(f"URL de webhook inválida: {url}")
+        self.url = url
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        self.stats = stats
+        self.pending = [] # heap de (horário_pronto, seq, tentativas, horário_enfileirado, lote)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.in_flight = 0
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(CONNECTIONS_PER_WEBHOOK)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def enqueue(self, batch, attempts=0, ready_at=None, enqueued_at=None):
+        """Agenda um lote. Retentativas repassam o enqueued_at original, usado para escolher o lote mais antigo."""
+        now = time.monotonic()
+        with self.condition:
+            if len(self.pending) >= MAX_PENDING_BATCHES:
+                # Mantém os alertas mais recentes: descarta o lote que entrou na fila há mais tempo
+                oldest = min(range(len(self.pending)), key=lambda i: self.pending[i][3])
+                self.stats.add("dropped_overflow", len(self.pending[oldest][4]))
+                self.pending[oldest] = self.pending[-1]
+                self.pending.pop()
+                heapq.heapify(self.pending)
+            heapq.heappush(self.pending, (ready_at or now, next(self.sequence), attempts, enqueued_at or now, batch))
+            self.condition.notify()
+
+    def _next_batch(self):
+        with self.condition:
+            while True:
+                if self.stopping:
+                    # Lotes que não saíram até o encerramento (ex: aguardando retentativa) são descartados
+                    self.stats.add("dropped_failed", sum(len(entry[4]) for entry in self.pending))
+                    self.pending.clear()
+                    return None
+                wait = None
+                if self.pending:
+                    wait = self.pending[0][0] - time.monotonic()
+                    if wait <= 0:
+                        _, _, attempts, enqueued_at, batch = heapq.heappop(self.pending)
+                        self.in_flight += 1
+                        return attempts, enqueued_at, batch
+                self.condition.wait(wait)
+
+    def _worker(self):
+        connection = None
+        while True:
+            item = self._next_batch()
+            if item is None:
+                break
+            attempts, enqueued_at, batch = item
+            body = json.dumps({"alerts": batch}).encode("utf-8")
+            try:
+                connection, status = self._post(connection, body)
+                delivered = 200 <= status < 300
+                retryable = status == 429 or status >= 500
+            except (OSError, http.client.HTTPException):
+                connection, delivered, retryable = None, False, True
+
+            if delivered:
+                self.stats.add("forwarded_batches")
+                self.stats.add("forwarded_alerts", len(batch))
+            elif retryable and attempts + 1 < MAX_ATTEMPTS and not self.stopping:
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempts) * random.uniform(0.5, 1.0)
+                self.stats.add("retried_batches")
+                self.enqueue(batch, attempts + 1, time.monotonic() + delay, enqueued_at)
+            else:
+                self.stats.add("dropped_failed", len(batch))
+
+            with self.condition:
+                self.in_flight -= 1
+                self.condition.notify_all()
+        if connection is not None:
+            connection.close()
+
+    def _post(self, connection, body):
+        """
+        Envia o lote reutilizando a conexão; se o servidor fechou a conexão ociosa, reconecta e reenvia.
+        O destino pode já ter processado o lote antes de cair, então pode receber alertas repetidos:
+        cada alerta leva um "id" único (alert_server.py) para o destino descartar duplicatas.
+        """
+        while True:
+            reused = connection is not None
+            if connection is None:
+                connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+                connection = connection_class(self.host, self.port, timeout=REQUEST_TIMEOUT_SECONDS)
+                self.stats.add("connections_opened")
+            try:
+                connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = None
+                stale = isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+                if reused and stale:
+                    continue
+                raise
+            if response.will_close:
+                connection.close()
+                connection = None
+            return connection, response.status
+
+    def drain(self, timeout):
+        """Espera esvaziar a fila (inclusive retentativas já agendadas) por até timeout segundos."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(REQUEST_TIMEOUT_SECONDS)
+
+class AlertForwarder:
+    """
+    Encaminha alertas recebidos para webhooks HTTP sem bloquear quem os recebe.
+    submit() apenas coloca o alerta em uma fila limitada; uma thread agrupa os alertas
+    em lotes (BATCH_WINDOW_SECONDS) e os distribui para cada webhook.
+    """
+
+    def __init__(self, webhook_urls):
+        self.stats = ForwardingStats()
+        self.destinations = [WebhookDestination(url, self.stats) for url in webhook_urls]
+        self.intake = queue.Queue(maxsize=MAX_QUEUED_ALERTS)
+        self.batcher = threading.Thread(target=self._batch_loop, daemon=True)
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for destination in self.destinations:
+            destination.start()
+        self.batcher.start()
+
+    def submit(self, alert):
+        """Enfileira um alerta (dict). Nunca bloqueia; retorna False se a fila estiver cheia."""
+        try:
+            self.intake.put_nowait(alert)
+        except queue.Full:
+            self.stats.add("dropped_queue_full")
+            return False
+        self.stats.add("submitted_alerts")
+        return True
+
+    def _batch_loop(self):
+        while True:
+            first = self.intake.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + BATCH_WINDOW_SECONDS
+            stop_after_batch = False
+            while len(batch) < MAX_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self.intake.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stop_after_batch = True
+                    break
+                batch.append(alert)
+            for destination in self.destinations:
+                destination.enqueue(batch)
+            if stop_after_batch:
+                break
+
+    def snapshot(self):
+        stats = self.stats.snapshot()
+        stats["queued_alerts"] = self.intake.qsize()
+        stats["pending_batches"] = sum(len(destination.pending) for destination in self.destinations)
+        return stats
+
+    def stop(self, timeout=REQUEST_TIMEOUT_SECONDS):
+        """Envia o que já está na fila (por até timeout segundos) e encerra as threads."""
+        if not self.running:
+            return
+        self.running = False
+        self.intake.put(None) # Sentinela de encerramento, depois dos alertas já enfileirados
+        self.batcher.join(timeout)
+        deadline = time.monotonic() + timeout
+        for destination in self.destinations:
+            destination.drain(max(0.0, deadline - time.monotonic()))
+            destination.stop()
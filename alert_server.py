@@ -1,47 +1,299 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import urlparse, parse_qs
+from collections import OrderedDict
+import threading
+import json
 import time
+import uuid
 import os
+from alert_forwarder import AlertForwarder
 
 # IP do servidor: Deixe como "0.0.0.0" para escutar em todas as interfaces de rede disponíveis.
 # O ESP32 deve ser configurado para enviar alertas para o IP específico do seu PC na rede local (ex: 172.22.0.7).
-HOST_NAME = "0.0.0.0" 
+HOST_NAME = "0.0.0.0"
 PORT_NUMBER = 8080 # Deve ser a mesma porta configurada no ESP32
 
+# Limite de taxa por dispositivo (token bucket): um ESP32 com defeito em loop não pode monopolizar o servidor.
+# O firmware envia no máximo um alerta por janela (1s), então 1 alerta/s com rajada de 5 não afeta dispositivos normais.
+CLIENT_RATE_PER_SECOND = 1.0
+CLIENT_BURST = 5
+CLIENT_IDLE_SECONDS = 300      # Dispositivos sem alertas há mais tempo que isso são removidos da tabela
+MAX_TRACKED_CLIENTS = 10000    # Limite de memória da tabela de dispositivos (remove os mais antigos)
+
+# Limite por IP, aplicado antes do limite por dispositivo: o parâmetro device é escolhido pelo cliente,
+# então trocar de device a cada alerta não pode render uma rajada nova. Comporta ~10 ESP32 atrás do mesmo NAT.
+IP_RATE_PER_SECOND = 10.0
+IP_BURST = 20
+
+# Capacidade global: acima disso o servidor descarta carga com 503 em vez de acumular atraso.
+GLOBAL_RATE_PER_SECOND = 200.0
+GLOBAL_BURST = 400
+MAX_CONCURRENT_REQUESTS = 32  # Conexões atendidas ao mesmo tempo (uma thread cada); as excedentes recebem 503 sem criar thread
+MAX_CONNECTIONS_PER_IP = 8    # Um único IP (ex: conexões travadas) não ocupa todas as vagas
+REQUEST_TIMEOUT_SECONDS = 5    # Conexões lentas não seguram uma thread indefinidamente
+
+# Webhooks que recebem os alertas aceitos (POST JSON {"alerts": [...]}), ex: ["http://192.168.1.20:9000/alertas"].
+# Lista vazia = alertas apenas exibidos no console. Lotes, retentativas e conexões são configurados em alert_forwarder.py.
+FORWARD_WEBHOOK_URLS = []
+
+class TokenBucketLimiter:
+    """
+    Token buckets por chave (dispositivo) em um OrderedDict ordenado pelo último acesso.
+    Cada entrada guarda apenas [tokens, último_acesso, alertas_suprimidos]; entradas ociosas
+    são removidas do início da fila a cada acesso, em O(1) amortizado.
+    """
+
+    def __init__(self, rate, burst, idle_seconds, max_keys):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = idle_seconds
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def acquire(self, key, now=None):
+        """
+        Consome um token da chave. Retorna (permitido, segundos_até_próximo_token, suprimidos_antes),
+        onde suprimidos_antes é o número de alertas recusados desde o último aceito.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.buckets.get(key)
+            if entry is None:
+                entry = [float(self.burst), now, 0]
+                self.buckets[key] = entry
+            else:
+                entry[0] = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+                entry[1] = now
+                self.buckets.move_to_end(key)
+            self._evict(now)
+
+            if entry[0] >= 1.0:
+                entry[0] -= 1.0
+                suppressed, entry[2] = entry[2], 0
+                return True, 0.0, suppressed
+            entry[2] += 1
+            return False, (1.0 - entry[0]) / self.rate, entry[2]
+
+    def refund(self, key):
+        """Devolve o token de um alerta aceito por este limitador mas recusado por um limite seguinte."""
+        with self.lock:
+            entry = self.buckets.get(key)
+            if entry is not None:
+                entry[0] = min(self.burst, entry[0] + 1.0)
+
+    def _evict(self, now):
+        while self.buckets:
+            key, entry = next(iter(self.buckets.items()))
+            if now - entry[1] <= self.idle_seconds and len(self.buckets) <= self.max_keys:
+                break
+            self.buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self.buckets)
+
+class AlertStats:
+    """Contadores de alertas aceitos e suprimidos, expostos em /stats."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {"accepted": 0, "rate_limited_429": 0, "overload_shed_503": 0}
+        self.suppressed_by_client = {}
+
+    def count(self, name, client_key=None):
+        with self.lock:
+            self.counters[name] += 1
+            if client_key is not None:
+                self.suppressed_by_client[client_key] = self.suppressed_by_client.get(client_key, 0) + 1
+                if len(self.suppressed_by_client) > MAX_TRACKED_CLIENTS:
+                    # Mantém apenas os dispositivos com mais supressões
+                    top = sorted(self.suppressed_by_client.items(), key=lambda item: item[1], reverse=True)
+                    self.suppressed_by_client = dict(top[:MAX_TRACKED_CLIENTS // 2])
+
+    def snapshot(self, tracked_clients):
+        with self.lock:
+            top_suppressed = sorted(self.suppressed_by_client.items(), key=lambda item: item[1], reverse=True)[:20]
+            return dict(self.counters, tracked_clients=tracked_clients, top_suppressed_clients=dict(top_suppressed))
+
+ip_limiter = TokenBucketLimiter(IP_RATE_PER_SECOND, IP_BURST, CLIENT_IDLE_SECONDS, MAX_TRACKED_CLIENTS)
+client_limiter = TokenBucketLimiter(CLIENT_RATE_PER_SECOND, CLIENT_BURST, CLIENT_IDLE_SECONDS, MAX_TRACKED_CLIENTS)
+global_limiter = TokenBucketLimiter(GLOBAL_RATE_PER_SECOND, GLOBAL_BURST, float("inf"), 1)
+alert_stats = AlertStats()
+alert_forwarder = None # Criado em __main__ se houver FORWARD_WEBHOOK_URLS
+
 class AlertHandler(BaseHTTPRequestHandler):
+    timeout = REQUEST_TIMEOUT_SECONDS
+
     def do_GET(self):
         parsed_path = urlparse(self.path)
         query_params = parse_qs(parsed_path.query)
 
         if parsed_path.path == "/alert":
-            alert_type = query_params.get("type", [None])[0]
-            client_address = self.client_address[0]
-            
-            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] ALERTA RECEBIDO de {client_address}!")
-            if alert_type:
-                print(f"  Tipo de Alerta: {alert_type}")
-            else:
-                print("  Tipo de Alerta: Não especificado")
+            self.handle_alert(query_params)
+        elif parsed_path.path == "/stats":
+            stats = alert_stats.snapshot(len(client_limiter))
+            if alert_forwarder is not None:
+                stats["forwarding"] = alert_forwarder.snapshot()
+            self.send_text(200, json.dumps(stats, indent=2).encode("utf-8"), content_type="application/json")
+        else:
+            self.send_text(404, b"Endpoint nao encontrado.")
 
-            self.send_response(200)
-            self.send_header("Content-type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"Alerta recebido pelo servidor Python!")
+    def handle_alert(self, query_params):
+        alert_type = query_params.get("type", [None])[0]
+        device_id = query_params.get("device", [None])[0]
+        client_address = self.client_address[0]
+        # Vários ESP32 atrás do mesmo IP (NAT) são separados pelo parâmetro device, se enviado
+        client_key = f"{client_address}/{device_id}" if device_id else client_address
+
+        # Limites do mais amplo por cliente ao global; um alerta recusado devolve os tokens já consumidos
+        allowed, retry_after, ip_suppressed = ip_limiter.acquire(client_address)
+        if not allowed:
+            alert_stats.count("rate_limited_429", client_address)
+            if ip_suppressed == 1: # Avisa só na primeira supressão para não inundar o console
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Limite de taxa atingido pelo IP {client_address}. Suprimindo alertas.")
+            self.send_text(429, b"Limite de alertas excedido para este IP.", retry_after=retry_after)
+            return
+
+        allowed, retry_after, suppressed = client_limiter.acquire(client_key)
+        if not allowed:
+            ip_limiter.refund(client_address)
+            alert_stats.count("rate_limited_429", client_key)
+            if suppressed == 1:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Limite de taxa atingido por {client_key}. Suprimindo alertas.")
+            self.send_text(429, b"Limite de alertas excedido para este dispositivo.", retry_after=retry_after)
+            return
+
+        allowed, retry_after, _ = global_limiter.acquire("global")
+        if not allowed:
+            ip_limiter.refund(client_address)
+            client_limiter.refund(client_key)
+            alert_stats.count("overload_shed_503")
+            self.send_text(503, b"Servidor sobrecarregado. Tente novamente.", retry_after=retry_after)
+            return
+
+        alert_stats.count("accepted")
+        if alert_forwarder is not None:
+            # Só enfileira: o envio aos webhooks acontece em outras threads e nunca atrasa esta resposta
+            alert_forwarder.submit({
+                "id": uuid.uuid4().hex, # Permite ao destino descartar alertas reenviados após uma conexão cair
+                "received_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "client": client_key,
+                "device": device_id,
+                "type": alert_type,
+            })
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] ALERTA RECEBIDO de {client_key}!")
+        if suppressed:
+            print(f"  ({suppressed} alertas deste dispositivo foram suprimidos pelo limite de taxa)")
+        if alert_type:
+            print(f"  Tipo de Alerta: {alert_type}")
         else:
-            self.send_response(404)
-            self.send_header("Content-type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"Endpoint nao encontrado.")
+            print("  Tipo de Alerta: Não especificado")
 
-if __name__ == "__main__":
+        self.send_text(200, b"Alerta recebido pelo servidor Python!")
+
+    def send_text(self, status, body, content_type="text/plain", retry_after=None):
+        self.send_response(status)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(max(1, int(retry_after + 0.999))))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        # Respostas 429/503 não são registradas uma a uma: sob inundação o log viraria o gargalo
+        if code in (429, 503):
+            return
+        super().log_request(code, size)
+
+SHED_RESPONSE = (b"HTTP/1.0 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Type: text/plain\r\n"
+                 b"Content-Length: 41\r\nConnection: close\r\n\r\nServidor sobrecarregado. Tente novamente.")
+
+class AlertServer(ThreadingHTTPServer):
+    """
+    Uma thread por conexão, para que um cliente lento ou em loop não bloqueie os demais.
+    No máximo MAX_CONCURRENT_REQUESTS conexões (e MAX_CONNECTIONS_PER_IP por IP) são atendidas
+    ao mesmo tempo: a vaga é reservada antes de criar a thread, e sem vaga a conexão recebe 503
+    e é fechada na hora.
+    """
+    daemon_threads = True
+    request_queue_size = 128 # Fila de conexões do listen(); o padrão (5) descarta conexões sob rajadas
+
+    def __init__(self, server_address, handler_class, max_concurrent=MAX_CONCURRENT_REQUESTS,
+                 max_per_ip=MAX_CONNECTIONS_PER_IP):
+        super().__init__(server_address, handler_class)
+        self.max_concurrent = max_concurrent
+        self.max_per_ip = max_per_ip
+        self.active_connections = 0
+        self.connections_per_ip = {}
+        self.connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        if not self.reserve_slot(client_address[0]):
+            alert_stats.count("overload_shed_503")
+            self.shed_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self.release_slot(client_address[0])
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.release_slot(client_address[0])
+
+    def reserve_slot(self, ip):
+        with self.connections_lock:
+            per_ip = self.connections_per_ip.get(ip, 0)
+            if self.active_connections >= self.max_concurrent or per_ip >= self.max_per_ip:
+                return False
+            self.active_connections += 1
+            self.connections_per_ip[ip] = per_ip + 1
+            return True
+
+    def release_slot(self, ip):
+        with self.connections_lock:
+            self.active_connections -= 1
+            if self.connections_per_ip[ip] == 1:
+                del self.connections_per_ip[ip]
+            else:
+                self.connections_per_ip[ip] -= 1
+
+    def shed_request(self, request):
+        """Responde 503 sem bloquear a thread que aceita conexões e fecha o socket."""
+        try:
+            request.setblocking(False)
+            try:
+                request.recv(65536) # Lê o pedido, se já chegou, para o fechamento não virar um RST
+            except OSError:
+                pass
+            request.send(SHED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+def create_server(host=HOST_NAME, port=PORT_NUMBER):
+    return AlertServer((host, port), AlertHandler)
+
+def main():
+    global alert_forwarder
     # Garante que estamos no diretório certo se o script for movido
     # script_dir = os.path.dirname(os.path.abspath(__file__))
     # print(f"Servidor rodando no diretório: {script_dir}") # Descomente se precisar depurar o diretório
 
-    httpd = HTTPServer((HOST_NAME, PORT_NUMBER), AlertHandler)
+    httpd = create_server()
+    if FORWARD_WEBHOOK_URLS:
+        alert_forwarder = AlertForwarder(FORWARD_WEBHOOK_URLS)
+        alert_forwarder.start()
     print(time.strftime("[%Y-%m-%d %H:%M:%S]"))
     print(f"Servidor de Alerta iniciado em http://{HOST_NAME}:{PORT_NUMBER}")
     print(f"Esperando por alertas do ESP32 no IP do seu PC ({PORT_NUMBER}/alert?type=...)")
+    print(f"Contadores de alertas aceitos/suprimidos em http://{HOST_NAME}:{PORT_NUMBER}/stats")
+    if alert_forwarder is not None:
+        print(f"Encaminhando alertas para: {', '.join(FORWARD_WEBHOOK_URLS)}")
     print("Pressione Ctrl+C para parar o servidor.")
 
     try:
@@ -50,4 +302,9 @@ if __name__ == "__main__":
         pass
     finally:
         httpd.server_close()
-        print(time.strftime("[%Y-%m-%d %H:%M:%S]") + " Servidor parado.") 
\ No newline at end of file
+        if alert_forwarder is not None:
+            alert_forwarder.stop()
+        print(time.strftime("[%Y-%m-%d %H:%M:%S]") + " Servidor parado.")
+
+if __name__ == "__main__":
+    main()
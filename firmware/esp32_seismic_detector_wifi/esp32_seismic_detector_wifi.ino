@@ -119,7 +119,8 @@ void connect_to_wifi() {
 void sendHttpAlert(String alertType) {
     if (WiFi.status() == WL_CONNECTED) {
         HTTPClient http;
-        String server_url = "http://" + String(SERVER_IP) + ":" + String(SERVER_PORT) + "/alert?type=" + alertType;
+        // device identifica este ESP32 no servidor (limite de taxa por dispositivo)
+        String server_url = "http://" + String(SERVER_IP) + ":" + String(SERVER_PORT) + "/alert?type=" + alertType + "&device=" + WiFi.macAddress();
         
         Serial.print("Enviando alerta para: ");
         Serial.println(server_url);
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import itertools
+import http.client
+
+# Permite importar alert_server.py da pasta raiz do projeto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import alert_server
+
+# --- Configurações ---
+TEST_HOST = '127.0.0.1'
+TEST_PORT = 18080            # Porta local só para o teste (não conflita com o servidor real em 8080)
+LEGIT_DEVICES = 5            # Dispositivos normais, cada um enviando um alerta por intervalo
+LEGIT_INTERVAL_SECONDS = 1.0 # Mesmo ritmo máximo do firmware (uma janela de 1s)
+FLOOD_THREADS = 8            # Threads simulando um único ESP32 com defeito em loop
+FLOOD_SOURCE_IP = '127.0.0.2' # O dispositivo em loop fica em outro IP (qualquer 127.x.x.x é local no Linux)
+PHASE_SECONDS = 5            # Duração de cada fase (sem inundação / com inundação)
+IDLE_CONNECTIONS = 100       # Conexões abertas pelo IP do dispositivo em loop sem enviar nada
+# ---------------------
+
+
+def send_alert(device_id, source_ip=None):
+    """Envia um alerta e retorna (código HTTP, latência em ms)."""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection(TEST_HOST, TEST_PORT, timeout=10,
+                                      source_address=(source_ip, 0) if source_ip else None)
+    try:
+        conn.request('GET', f'/alert?type=teste&device={device_id}')
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except OSError:
+        status = 0
+    finally:
+        conn.close()
+    return status, (time.perf_counter() - started) * 1000
+
+
+def legit_device(device_id, stop_event, results):
+    while not stop_event.is_set():
+        results.append(send_alert(device_id))
+        stop_event.wait(LEGIT_INTERVAL_SECONDS)
+
+
+def flood_device(stop_event, results, next_device_id):
+    while not stop_event.is_set():
+        results.append(send_alert(next_device_id(), FLOOD_SOURCE_IP)[0])
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def run_phase(flood=None, idle_connections=0):
+    """flood: None, 'fixed' (sempre o mesmo device) ou 'rotating' (um device novo a cada alerta)."""
+    stop_event = threading.Event()
+    legit_results, flood_results = [], []
+    threads = [threading.Thread(target=legit_device, args=(f'esp32_{i}', stop_event, legit_results)) for i in range(LEGIT_DEVICES)]
+    if flood == 'fixed':
+        next_device_id = lambda: 'esp32_defeituoso'
+    else:
+        counter = itertools.count() # next() em itertools.count é atômico no CPython
+        next_device_id = lambda: f'esp32_falso_{next(counter)}'
+    if flood:
+        threads += [threading.Thread(target=flood_device, args=(stop_event, flood_results, next_device_id)) for _ in range(FLOOD_THREADS)]
+    idle = open_idle_connections(idle_connections)
+    for thread in threads:
+        thread.start()
+    time.sleep(PHASE_SECONDS)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    idle_results = [read_idle_response(sock) for sock in idle]
+    return legit_results, flood_results, idle_results
+
+
+def open_idle_connections(count):
+    """Abre conexões que não enviam nada, como clientes lentos/travados segurando o servidor."""
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection((TEST_HOST, TEST_PORT), timeout=10, source_address=(FLOOD_SOURCE_IP, 0))
+        sockets.append(sock)
+    return sockets
+
+
+def read_idle_response(sock):
+    """Código HTTP recebido pela conexão ociosa (503 = recusada na hora; 0 = atendida e fechada sem resposta no timeout)."""
+    try:
+        data = sock.recv(64)
+        return int(data.split(b' ')[1]) if data.startswith(b'HTTP/') else 0
+    except OSError:
+        return 0
+    finally:
+        sock.close()
+
+
+def print_phase(name, legit_results, flood_results, idle_results):
+    latencies = [latency for _, latency in legit_results]
+    ok = sum(1 for status, _ in legit_results if status == 200)
+    print(f"\n{name}:")
+    print(f"  Dispositivos normais: {ok}/{len(legit_results)} alertas aceitos | "
+          f"latência p50 = {percentile(latencies, 0.5):.1f} ms, p99 = {percentile(latencies, 0.99):.1f} ms, "
+          f"máx. = {max(latencies, default=float('nan')):.1f} ms")
+    if flood_results:
+        codes = {code: flood_results.count(code) for code in sorted(set(flood_results))}
+        rate = len(flood_results) / PHASE_SECONDS
+        print(f"  Dispositivo em loop: {len(flood_results)} requisições ({rate:.0f}/s), códigos de resposta: {codes}")
+    if idle_results:
+        codes = {code: idle_results.count(code) for code in sorted(set(idle_results))}
+        print(f"  Conexões ociosas: {len(idle_results)}, respostas: {codes} | threads no processo durante a fase: até {peak_threads[0]}")
+
+
+peak_threads = [0]
+
+def track_peak_threads():
+    while True:
+        peak_threads[0] = max(peak_threads[0], threading.active_count())
+        time.sleep(0.01)
+
+
+def main():
+    print("--- Teste de Inundação do Servidor de Alertas ---")
+    alert_server.print = lambda *args, **kwargs: None # Silencia o console do servidor durante o teste
+    alert_server.AlertHandler.log_message = lambda self, *args: None
+    httpd = alert_server.create_server(TEST_HOST, TEST_PORT)
+    server_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    server_thread.start()
+
+    monitor = threading.Thread(target=track_peak_threads, daemon=True)
+    monitor.start()
+    try:
+        print_phase("Fase 1 - sem inundação", *run_phase())
+        print_phase("Fase 2 - um dispositivo inundando /alert", *run_phase(flood='fixed'))
+        print_phase("Fase 3 - inundação trocando o parâmetro device a cada alerta", *run_phase(flood='rotating'))
+        peak_threads[0] = 0
+        print_phase(f"Fase 4 - {IDLE_CONNECTIONS} conexões ociosas de um IP (limites: {alert_server.MAX_CONNECTIONS_PER_IP} por IP, "
+                    f"{alert_server.MAX_CONCURRENT_REQUESTS} no total)",
+                    *run_phase(idle_connections=IDLE_CONNECTIONS))
+
+        conn = http.client.HTTPConnection(TEST_HOST, TEST_PORT, timeout=10)
+        conn.request('GET', '/stats')
+        stats = json.loads(conn.getresponse().read())
+        conn.close()
+        print("\nContadores em /stats:")
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    print("\nTeste de inundação concluído.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+import os
+import time
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# --- Configurações ---
+# Arquivos brutos (com marcadores) e o rótulo de cada um, como em extract_labeled_segments.py
+RAW_LOGS = [
+    (os.path.join('..', 'data', 'raw_data', 'raw_sensor_log_with_markers_0.csv'), 0), # NÃO TREMOR
+    (os.path.join('..', 'data', 'raw_data', 'raw_sensor_log_with_markers_1.csv'), 1), # TREMOR
+]
+SCALER_FILE_PATH = os.path.join('..', 'logistic_model_parameters', 'scaler.pkl')
+MODEL_FILE_PATH = os.path.join('..', 'logistic_model_parameters', 'trained_model.pkl')
+
+OUTPUT_SUMMARY_CSV = 'alert_policy_replay.csv'          # Uma linha por configuração
+OUTPUT_LATENCIES_CSV = 'alert_policy_latencies.csv'     # Latência de cada evento por configuração
+
+# Marcadores definidos no script ESP32 e Python de coleta
+MARKER_START_EVENT = 1
+MARKER_END_EVENT = 2
+
+# Grade de políticas avaliadas.
+# O modelo foi treinado com janelas de 50 amostras; as features de energia dependem do tamanho
+# da janela, então outros tamanhos só fazem sentido após retreinar o modelo com eles.
+WINDOW_SIZES = [50]
+STEP_SIZES = [10, 25, 50]                       # 50 = janelas sem sobreposição (como no firmware)
+THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.01), 2)
+CONSECUTIVE_COUNTS = np.arange(1, 11)           # MIN_CONSECUTIVE_WINDOWS_FOR_ALERT
+
+# Critérios para sugerir a configuração mais rápida com taxa de alarmes falsos aceitável
+MAX_FALSE_ALARMS_PER_HOUR = 1.0
+MIN_DETECTION_RATE = 0.9
+# ---------------------
+
+FEATURE_STATS = ['mean', 'std', 'var', 'min', 'max', 'ptp', 'energy', 'mav']
+FEATURE_STREAMS = ['accel_x', 'accel_y', 'accel_z', 'svm']
+
+
+def load_stream(filename, label):
+    """Lê um log bruto e retorna tempos (s), eixos e a lista de eventos (índice de início, índice de fim)."""
+    df = pd.read_csv(filename)
+    timestamps = pd.to_datetime(df['timestamp_pc'], format='ISO8601')
+    t = (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy()
+    markers = df['event_marker_from_esp32'].to_numpy()
+
+    # Mesmo pareamento de marcadores usado em extract_labeled_segments.py
+    events = []
+    start_index = -1
+    for index in np.flatnonzero(markers):
+        if markers[index] == MARKER_START_EVENT:
+            start_index = index
+        elif markers[index] == MARKER_END_EVENT and start_index >= 0:
+            events.append((start_index, index))
+            start_index = -1
+
+    return {
+        'name': os.path.basename(filename),
+        'label': label,
+        't': t,
+        'accel': df[['accel_x', 'accel_y', 'accel_z']].to_numpy(dtype=float),
+        'events': events,
+    }
+
+
+def extract_window_features(accel, window_size, step_size):
+    """
+    Calcula as 32 features de feature_extractor.py para todas as janelas de uma vez.
+    Retorna uma matriz (n_janelas, 32) na mesma ordem de colunas usada no treinamento.
+    """
+    svm = np.sqrt(np.sum(accel**2, axis=1))
+    columns = []
+    for data_axis in (accel[:, 0], accel[:, 1], accel[:, 2], svm):
+        windows = sliding_window_view(data_axis, window_size)[::step_size]
+        mean = windows.mean(axis=1)
+        std = windows.std(axis=1)
+        min_val = windows.min(axis=1)
+        max_val = windows.max(axis=1)
+        columns += [mean, std, std**2, min_val, max_val, max_val - min_val,
+                    np.sum(windows**2, axis=1), np.mean(np.abs(windows), axis=1)]
+    return np.column_stack(columns)
+
+
+def score_stream(stream, window_size, step_size, scaler, model):
+    """Pontua cada janela do stream uma única vez. Retorna probabilidades e o índice da última amostra de cada janela."""
+    if len(stream['t']) < window_size:
+        return np.empty(0), np.empty(0, dtype=int)
+    features = extract_window_features(stream['accel'], window_size, step_size)
+    feature_names = [f'{stat}_{name}' for name in FEATURE_STREAMS for stat in FEATURE_STATS]
+    features_scaled = scaler.transform(pd.DataFrame(features, columns=feature_names))
+    probabilities = model.predict_proba(features_scaled)[:, 1]
+    window_end_index = np.arange(len(probabilities)) * step_size + window_size - 1
+    return probabilities, window_end_index
+
+
+def consecutive_run_lengths(probabilities, thresholds):
+    """
+    Para cada limiar, calcula quantas janelas consecutivas acima do limiar terminam em cada janela.
+    Equivale ao contador consecutive_tremor_windows do firmware. Retorna (n_limiares, n_janelas).
+    """
+    n_windows = len(probabilities)
+    index = np.arange(n_windows)
+    positive = probabilities[None, :] > thresholds[:, None]
+    last_negative = np.maximum.accumulate(np.where(positive, -1, index), axis=1)
+    return index - last_negative
+
+
+def evaluate_policies(stream, probabilities, window_end_index, thresholds, counts):
+    """
+    Avalia todas as combinações (limiar, janelas consecutivas) para um stream.
+    Retorna o número de alertas disparados (n_limiares, n_contagens) e, para cada evento marcado,
+    a latência de detecção em segundos (n_limiares, n_contagens, n_eventos; NaN = não detectado).
+    Processa um limiar por vez, então a memória usada é proporcional ao número de janelas.
+    """
+    n_windows = len(probabilities)
+    events = stream['events']
+    alert_count = np.zeros((len(thresholds), len(counts)), dtype=int)
+    latencies = np.full((len(thresholds), len(counts), len(events)), np.nan)
+    if n_windows == 0:
+        return alert_count, latencies
+
+    event_start = np.array([start for start, _ in events], dtype=int)
+    event_end = np.array([end for _, end in events], dtype=int)
+    first_window = np.searchsorted(window_end_index, event_start)
+    last_window = np.searchsorted(window_end_index, event_end, side='right') - 1
+    window_end_time = np.append(stream['t'][window_end_index], np.nan)
+    event_start_time = stream['t'][event_start]
+    first_window_clipped = np.minimum(first_window, n_windows - 1)
+
+    for i, threshold in enumerate(thresholds):
+        run_lengths = consecutive_run_lengths(probabilities, np.array([threshold]))[0]
+        run_at_first = np.where(first_window < n_windows, run_lengths[first_window_clipped], 0)
+        for j, required in enumerate(counts):
+            # O firmware dispara o alerta quando o contador atinge o mínimo (alert_active ainda falso)
+            fired = np.flatnonzero(run_lengths == required)
+            alert_count[i, j] = len(fired)
+            if not events:
+                continue
+            # Alerta já ativo na primeira janela do evento, ou o próximo disparo a partir dela
+            next_fired = np.append(fired, n_windows)[np.searchsorted(fired, first_window)]
+            first_alert = np.where(run_at_first >= required, first_window, next_fired)
+            detected = first_alert <= last_window
+            latencies[i, j] = np.where(detected, window_end_time[first_alert] - event_start_time, np.nan)
+    return alert_count, latencies
+
+
+def simulate_firmware_policy(stream, probabilities, window_end_index, threshold, required):
+    """
+    Implementação de referência, janela a janela, da lógica do firmware
+    (consecutive_tremor_windows / alert_active). Usada para conferir evaluate_policies.
+    """
+    consecutive_tremor_windows = 0
+    alert_active = False
+    alerts = 0
+    active = np.zeros(len(probabilities), dtype=bool)
+    for index, probability in enumerate(probabilities):
+        if probability > threshold:
+            consecutive_tremor_windows += 1
+            if consecutive_tremor_windows >= required and not alert_active:
+                alerts += 1
+                alert_active = True
+        else:
+            consecutive_tremor_windows = 0
+            alert_active = False
+        active[index] = alert_active
+
+    latencies = []
+    for start, end in stream['events']:
+        latency = np.nan
+        for index in range(len(probabilities)):
+            if window_end_index[index] >= start and window_end_index[index] <= end and active[index]:
+                latency = stream['t'][window_end_index[index]] - stream['t'][start]
+                break
+        latencies.append(latency)
+    return alerts, latencies
+
+
+def check_against_firmware_loop(n_windows=400, seed=0):
+    """Compara evaluate_policies com simulate_firmware_policy em uma sequência aleatória. Retorna o número de divergências."""
+    rng = np.random.default_rng(seed)
+    step_size, window_size = 5, 50
+    # Probabilidades com correlação entre janelas vizinhas, para gerar sequências longas acima do limiar
+    probabilities = np.clip(np.convolve(rng.random(n_windows + 4), np.ones(5) / 5, mode='valid')
+                            + rng.normal(0, 0.1, n_windows), 0, 1)
+    window_end_index = np.arange(n_windows) * step_size + window_size - 1
+    n_samples = window_end_index[-1] + 1
+    starts = np.sort(rng.choice(n_samples - 100, size=8, replace=False))
+    events = [(int(start), int(start + rng.integers(10, 100))) for start in starts]
+    stream = {'t': np.arange(n_samples) / 50.0, 'events': events}
+    thresholds = np.round(np.arange(0.3, 0.8, 0.05), 2)
+    counts = np.arange(1, 6)
+
+    alert_count, latencies = evaluate_policies(stream, probabilities, window_end_index, thresholds, counts)
+    mismatches = 0
+    for i, threshold in enumerate(thresholds):
+        for j, required in enumerate(counts):
+            alerts, expected = simulate_firmware_policy(stream, probabilities, window_end_index, threshold, required)
+            mismatches += int(alerts != alert_count[i, j])
+            mismatches += int(not np.allclose(latencies[i, j], expected, equal_nan=True))
+    return mismatches
+
+
+def latency_statistics(latencies):
+    """Taxa de detecção e distribuição das latências (média, p50, p90, máx.) de cada configuração."""
+    if latencies.shape[2] == 0:
+        empty = np.full(latencies.shape[:2], np.nan)
+        return np.zeros(latencies.shape[:2]), empty, empty, empty, empty
+    detection_rate = np.mean(~np.isnan(latencies), axis=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning) # Configurações sem nenhuma detecção
+        mean_latency = np.nanmean(latencies, axis=2)
+        p50, p90 = np.nanpercentile(latencies, [50, 90], axis=2)
+        max_latency = np.nanmax(latencies, axis=2)
+    return detection_rate, mean_latency, p50, p90, max_latency
+
+
+def main():
+    print("--- Iniciando Replay de Políticas de Alerta ---")
+
+    try:
+        with open(SCALER_FILE_PATH, 'rb') as f_scaler:
+            scaler = pickle.load(f_scaler)
+        with open(MODEL_FILE_PATH, 'rb') as f_model:
+            model = pickle.load(f_model)
+    except FileNotFoundError as e:
+        print(f"ERRO: Arquivo do modelo/scaler não encontrado: {e.filename}")
+        print("Certifique-se de que o script 'train_model.py' foi executado com sucesso.")
+        return
+
+    streams = []
+    for filename, label in RAW_LOGS:
+        try:
+            streams.append(load_stream(filename, label))
+        except FileNotFoundError:
+            print(f"ERRO: Arquivo não encontrado: {filename}")
+            return
+        stream = streams[-1]
+        print(f"Log lido: {stream['name']} (rótulo {label}, {len(stream['t'])} amostras, {len(stream['events'])} eventos marcados)")
+
+    # Horas de dados sem tremor (denominador da taxa de alarmes falsos)
+    no_tremor_hours = sum((s['t'][-1] - s['t'][0]) / 3600.0 for s in streams if s['label'] == 0 and len(s['t']) > 1)
+    if no_tremor_hours <= 0:
+        print("ERRO: Nenhum log de NÃO TREMOR disponível para estimar alarmes falsos.")
+        return
+
+    # Confere a avaliação vetorizada contra a lógica do firmware antes de usar os números
+    mismatches = check_against_firmware_loop()
+    if mismatches:
+        print(f"ERRO: evaluate_policies diverge da lógica do firmware em {mismatches} comparações.")
+        return
+    print("Avaliação vetorizada confere com a simulação janela a janela do firmware.")
+
+    thresholds = np.asarray(THRESHOLDS, dtype=float)
+    counts = np.asarray(CONSECUTIVE_COUNTS, dtype=int)
+    summaries = []
+    latency_frames = []
+    scoring_seconds = 0.0
+    evaluation_seconds = 0.0
+
+    for window_size in WINDOW_SIZES:
+        # Pontua uma única vez com o menor passo comum; passos maiores são sub-amostragens.
+        base_step = int(np.gcd.reduce(STEP_SIZES))
+        started = time.perf_counter()
+        scored = [score_stream(s, window_size, base_step, scaler, model) for s in streams]
+        scoring_seconds += time.perf_counter() - started
+
+        for step_size in STEP_SIZES:
+            started = time.perf_counter()
+            stride = step_size // base_step
+            false_alarms = np.zeros((len(thresholds), len(counts)), dtype=int)
+            event_latencies = []
+            for stream, (probabilities, window_end_index) in zip(streams, scored):
+                alert_count, latencies = evaluate_policies(stream, probabilities[::stride], window_end_index[::stride],
+                                                           thresholds, counts)
+                if stream['label'] == 0:
+                    false_alarms += alert_count
+                else:
+                    event_latencies.append(latencies)
+            latencies = np.concatenate(event_latencies, axis=2) if event_latencies else np.full(false_alarms.shape + (0,), np.nan)
+
+            detection_rate, mean_latency, p50, p90, max_latency = latency_statistics(latencies)
+            evaluation_seconds += time.perf_counter() - started
+
+            grid_threshold, grid_count = np.meshgrid(thresholds, counts, indexing='ij')
+            summary = pd.DataFrame({
+                'window_size': window_size,
+                'step_size': step_size,
+                'threshold': grid_threshold.ravel(),
+                'consecutive_windows': grid_count.ravel(),
+                'events': latencies.shape[2],
+                'detection_rate': detection_rate.ravel(),
+                'latency_mean_s': mean_latency.ravel(),
+                'latency_p50_s': p50.ravel(),
+                'latency_p90_s': p90.ravel(),
+                'latency_max_s': max_latency.ravel(),
+                'false_alarms': false_alarms.ravel(),
+                'false_alarms_per_hour': false_alarms.ravel() / no_tremor_hours,
+            })
+            summaries.append(summary)
+
+            latency_frame = summary[['window_size', 'step_size', 'threshold', 'consecutive_windows']].loc[
+                summary.index.repeat(latencies.shape[2])].reset_index(drop=True)
+            latency_frame['event'] = np.tile(np.arange(latencies.shape[2]), len(summary))
+            latency_frame['latency_s'] = latencies.reshape(-1)
+            latency_frames.append(latency_frame)
+
+    df_summary = pd.concat(summaries, ignore_index=True)
+    df_summary.to_csv(OUTPUT_SUMMARY_CSV, index=False)
+    pd.concat(latency_frames, ignore_index=True).to_csv(OUTPUT_LATENCIES_CSV, index=False)
+
+    print(f"\n{len(df_summary)} configurações avaliadas.")
+    print(f"Tempo de pontuação das janelas: {scoring_seconds:.3f} s | Tempo de avaliação das políticas: {evaluation_seconds:.3f} s")
+    print(f"Horas de dados sem tremor: {no_tremor_hours:.3f} h")
+    print(f"Resumo por configuração salvo em: {OUTPUT_SUMMARY_CSV}")
+    print(f"Latências por evento salvas em: {OUTPUT_LATENCIES_CSV}")
+
+    columns = ['window_size', 'step_size', 'threshold', 'consecutive_windows', 'detection_rate',
+               'latency_p50_s', 'latency_p90_s', 'false_alarms_per_hour']
+
+    # Política atual do firmware: janelas de 50 amostras sem sobreposição e 2 janelas consecutivas
+    current = df_summary[(df_summary['step_size'] == 50) & (df_summary['consecutive_windows'] == 2)
+                         & (df_summary['threshold'].isin([0.5, 0.9]))]
+    if not current.empty:
+        print("\nPolítica atual do firmware (limiar 0.5 / 0.9, 2 janelas consecutivas):")
+        print(current[columns].to_string(index=False))
+
+    acceptable = df_summary[(df_summary['false_alarms_per_hour'] <= MAX_FALSE_ALARMS_PER_HOUR)
+                            & (df_summary['detection_rate'] >= MIN_DETECTION_RATE)]
+    if acceptable.empty:
+        print(f"\nNenhuma configuração atende a <= {MAX_FALSE_ALARMS_PER_HOUR} alarmes falsos/h com detecção >= {MIN_DETECTION_RATE:.0%}.")
+    else:
+        print(f"\nConfigurações mais rápidas com <= {MAX_FALSE_ALARMS_PER_HOUR} alarmes falsos/h e detecção >= {MIN_DETECTION_RATE:.0%}:")
+        print(acceptable.sort_values(['latency_p90_s', 'latency_p50_s'])[columns].head(10).to_string(index=False))
+
+    print("\nReplay de políticas de alerta concluído.")
+
+if __name__ == '__main__':
+    main()
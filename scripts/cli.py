@@ -0,0 +1,67 @@
+import os
+import sys
+import argparse
+import importlib
+
+# Ponto de entrada único do pipeline. Cada subcomando importa seu módulo (e, com ele,
+# pandas/sklearn/matplotlib/pyserial) apenas quando é executado, então comandos leves
+# como 'serve' e a ajuda (-h) iniciam sem carregar as bibliotecas pesadas.
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# subcomando: (módulo, função, descrição)
+COMMANDS = {
+    'ingest': ('marker_data_collector', 'run_marker_collection', "Coleta dados do ESP32 pela serial com marcadores de evento"),
+    'segment': ('extract_labeled_segments', 'main', "Extrai e rotula os segmentos marcados nos logs brutos"),
+    'features': ('feature_extractor', 'main', "Calcula as features das janelas do dataset rotulado"),
+    'train': ('train_model', 'main', "Treina o modelo e gera os parâmetros para o ESP32"),
+    'export': ('train_model', 'export_saved_model', "Regenera os parâmetros para C a partir do modelo já salvo"),
+    'serve': ('alert_server', 'main', "Inicia o servidor que recebe os alertas Wi-Fi"),
+    'plot': ('live_plotter', 'main', "Mostra as leituras do acelerômetro em tempo real"),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Pipeline do detector de tremores sísmicos.")
+    # Usado por cli_startup_benchmark.py: importa o subcomando e sai sem executá-lo
+    parser.add_argument('--startup-only', action='store_true', help=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest='command', metavar='<comando>')
+    for name, (_, _, description) in COMMANDS.items():
+        subparsers.add_parser(name, help=description, description=description)
+    return parser
+
+def load_command(name):
+    """Importa o módulo do subcomando e retorna a função a executar."""
+    module_name, function_name, _ = COMMANDS[name]
+    for path in (SCRIPTS_DIR, PROJECT_DIR): # alert_server.py fica na raiz do projeto
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    try:
+        command = load_command(args.command)
+    except ImportError as e:
+        print(f"ERRO: Dependência ausente para o comando '{args.command}': {e}")
+        print("Instale as bibliotecas listadas no README (pip install <nome_da_biblioteca>).")
+        return 1
+    if args.startup_only:
+        return 0
+    try:
+        command()
+    except ImportError as e:
+        # Os módulos importam pandas/sklearn/matplotlib/pyserial dentro das funções
+        print(f"ERRO: Dependência ausente para o comando '{args.command}': {e}")
+        print("Instale as bibliotecas listadas no README (pip install <nome_da_biblioteca>).")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
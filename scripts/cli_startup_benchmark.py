@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+from cli import COMMANDS
+
+# --- Configurações ---
+RUNS_PER_COMMAND = 7              # Execuções por subcomando (reporta mínimo e mediana)
+STARTUP_TARGET_MS = 100           # Meta de inicialização para os comandos leves
+LIGHTWEIGHT_COMMANDS = ['serve', 'ingest'] # Comandos que não dependem de pandas/sklearn/matplotlib
+# ---------------------
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py')
+
+
+def measure(args):
+    """Executa o comando em um processo novo RUNS_PER_COMMAND vezes. Retorna (tempos em ms, sucesso)."""
+    timings = []
+    ok = True
+    for _ in range(RUNS_PER_COMMAND):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, capture_output=True)
+        timings.append((time.perf_counter() - started) * 1000)
+        ok = ok and result.returncode == 0
+    return timings, ok
+
+
+def main():
+    print("--- Benchmark de Inicialização do cli.py ---")
+    print(f"Cada medição é um processo Python novo que importa o subcomando e sai (--startup-only), {RUNS_PER_COMMAND} execuções.")
+    print("Os comandos que não estão em LIGHTWEIGHT_COMMANDS importam pandas/sklearn/matplotlib/pyserial só ao executar,")
+    print("então para eles a medição cobre apenas a importação do módulo, não a das bibliotecas nem suas dependências.\n")
+
+    rows = [('(python -c pass)', ['-c', 'pass']), ('(cli.py -h)', [CLI_PATH, '-h'])]
+    rows += [(name, [CLI_PATH, '--startup-only', name]) for name in COMMANDS]
+
+    print(f"{'Comando':<20} {'mín. (ms)':>10} {'mediana (ms)':>13}  Situação")
+    for name, args in rows:
+        timings, ok = measure(args)
+        status = ''
+        if not ok:
+            status = 'dependência ausente'
+        elif name in LIGHTWEIGHT_COMMANDS:
+            status = 'OK' if statistics.median(timings) < STARTUP_TARGET_MS else f'ACIMA da meta de {STARTUP_TARGET_MS} ms'
+        elif name in COMMANDS:
+            status = 'só importação do módulo'
+        print(f"{name:<20} {min(timings):>10.1f} {statistics.median(timings):>13.1f}  {status}")
+
+    print("\nBenchmark concluído.")
+
+if __name__ == '__main__':
+    main()
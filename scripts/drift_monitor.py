@@ -0,0 +1,239 @@
+import os
+import time
+import pickle
+import numpy as np
+
+# --- Configurações ---
+SCALER_FILE_PATH = os.path.join('..', 'logistic_model_parameters', 'scaler.pkl') # Baseline do treinamento
+CHECKPOINT_PATH = 'drift_monitor_state.npz'
+
+MIN_WINDOWS_FOR_DRIFT = 30     # Janelas necessárias antes de avaliar um dispositivo
+HALF_LIFE_WINDOWS = 1800       # Meia-vida do peso de uma janela nas estatísticas (1800 janelas de 1s = 30 min);
+                               # None = média de todo o histórico (um dispositivo antigo demora a mostrar deriva)
+MEAN_SHIFT_THRESHOLD = 3.0     # |média_dispositivo - média_treino| em desvios padrão do treino
+VARIANCE_RATIO_THRESHOLD = 9.0 # var_dispositivo / var_treino acima disso indica sensor ruidoso
+INITIAL_CAPACITY = 256         # Dispositivos pré-alocados; a capacidade dobra quando necessário
+
+BENCHMARK_DEVICES = 500        # Dispositivos simulados no benchmark
+BENCHMARK_WINDOWS_PER_DEVICE = 200
+REMOUNT_HEALTHY_WINDOWS = 7 * 24 * 3600 # Simulação: uma semana de janelas normais antes de remontar o sensor
+# ---------------------
+
+
+class DriftMonitor:
+    """
+    Estatísticas por dispositivo das features de cada janela, atualizadas com o algoritmo de
+    Welford com pesos exponenciais em O(1) por janela, comparadas com a média/escala do
+    StandardScaler do treinamento. O peso de uma janela cai pela metade a cada half_life_windows
+    janelas, então uma remontagem aparece no mesmo tempo para um dispositivo novo ou antigo.
+    Todos os dispositivos ficam em arrays contíguos (contagem, média e variância por feature), então
+    a memória por dispositivo é fixa e o estado inteiro é salvo/restaurado com um único np.savez.
+    """
+
+    def __init__(self, baseline_mean, baseline_scale, feature_names=None, capacity=INITIAL_CAPACITY,
+                 half_life_windows=HALF_LIFE_WINDOWS):
+        self.baseline_mean = np.asarray(baseline_mean, dtype=np.float64)
+        self.baseline_scale = np.asarray(baseline_scale, dtype=np.float64)
+        n_features = len(self.baseline_mean)
+        self.feature_names = list(feature_names) if feature_names is not None else [f'feature_{i}' for i in range(n_features)]
+        self.half_life_windows = half_life_windows
+        # Peso da janela mais recente depois do aquecimento; 0 = sem esquecimento (Welford comum)
+        self.alpha = 0.0 if half_life_windows is None else 1.0 - 0.5 ** (1.0 / half_life_windows)
+        self.device_rows = {}
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros((capacity, n_features))
+        self.var = np.zeros((capacity, n_features))
+
+    @classmethod
+    def from_scaler(cls, scaler, capacity=INITIAL_CAPACITY, half_life_windows=HALF_LIFE_WINDOWS):
+        feature_names = getattr(scaler, 'feature_names_in_', None)
+        return cls(scaler.mean_, scaler.scale_, feature_names, capacity, half_life_windows)
+
+    def _row(self, device):
+        row = self.device_rows.get(device)
+        if row is None:
+            row = len(self.device_rows)
+            if row == len(self.count):
+                self._grow(2 * len(self.count))
+            self.device_rows[device] = row
+        return row
+
+    def _grow(self, capacity):
+        n_features = self.mean.shape[1]
+        for name, shape in (('count', (capacity,)), ('mean', (capacity, n_features)), ('var', (capacity, n_features))):
+            old = getattr(self, name)
+            new = np.zeros(shape, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, device, features):
+        """
+        Acrescenta as features de uma janela às estatísticas do dispositivo (Welford com pesos
+        exponenciais). Nas primeiras janelas o peso é 1/contagem, o que equivale ao Welford comum,
+        até cair ao peso fixo alpha da meia-vida.
+        """
+        row = self._row(device)
+        count = int(self.count[row]) + 1
+        self.count[row] = count
+        weight = max(self.alpha, 1.0 / count)
+        delta = features - self.mean[row]
+        increment = weight * delta
+        self.mean[row] += increment
+        self.var[row] = (1.0 - weight) * (self.var[row] + delta * increment)
+
+    def reset(self, device):
+        """Zera as estatísticas do dispositivo (ex: depois de corrigir a montagem)."""
+        row = self.device_rows.get(device)
+        if row is not None:
+            self.count[row] = 0
+            self.mean[row] = 0.0
+            self.var[row] = 0.0
+
+    def drift_scores(self):
+        """
+        Para todos os dispositivos de uma vez: deslocamento da média em desvios padrão do treino
+        e razão entre a variância observada e a do treino. Retorna (dispositivos, contagens, z, razão_var).
+        """
+        n_devices = len(self.device_rows)
+        devices = sorted(self.device_rows, key=self.device_rows.get)
+        count = self.count[:n_devices]
+        scale = np.where(self.baseline_scale > 0, self.baseline_scale, 1.0)
+        mean_shift = (self.mean[:n_devices] - self.baseline_mean) / scale
+        variance_ratio = self.var[:n_devices] / scale**2
+        return devices, count, mean_shift, variance_ratio
+
+    def drifting_devices(self, top_features=3):
+        """Lista (dispositivo, janelas, features com maior deriva) dos dispositivos sinalizados."""
+        devices, count, mean_shift, variance_ratio = self.drift_scores()
+        # Só a variância maior que a do treino é sinalizada: o treino mistura janelas de tremor
+        # e de repouso, então um dispositivo parado tem naturalmente variância bem menor.
+        drifting = (count >= MIN_WINDOWS_FOR_DRIFT) & (
+            np.any(np.abs(mean_shift) > MEAN_SHIFT_THRESHOLD, axis=1)
+            | np.any(variance_ratio > VARIANCE_RATIO_THRESHOLD, axis=1))
+
+        report = []
+        for row in np.flatnonzero(drifting):
+            worst = np.argsort(-np.abs(mean_shift[row]))[:top_features]
+            report.append((devices[row], int(count[row]),
+                           [(self.feature_names[i], float(mean_shift[row, i])) for i in worst]))
+        return report
+
+    def checkpoint(self, path=CHECKPOINT_PATH):
+        n_devices = len(self.device_rows)
+        np.savez(path,
+                 devices=np.array(sorted(self.device_rows, key=self.device_rows.get), dtype=str),
+                 count=self.count[:n_devices], mean=self.mean[:n_devices], var=self.var[:n_devices],
+                 baseline_mean=self.baseline_mean, baseline_scale=self.baseline_scale,
+                 feature_names=np.array(self.feature_names, dtype=str),
+                 half_life_windows=np.nan if self.half_life_windows is None else self.half_life_windows)
+
+    @classmethod
+    def restore(cls, path=CHECKPOINT_PATH):
+        with np.load(path) as state:
+            n_devices = len(state['devices'])
+            half_life_windows = float(state['half_life_windows'])
+            monitor = cls(state['baseline_mean'], state['baseline_scale'], state['feature_names'],
+                          capacity=max(INITIAL_CAPACITY, n_devices),
+                          half_life_windows=None if np.isnan(half_life_windows) else int(half_life_windows))
+            monitor.device_rows = {str(device): row for row, device in enumerate(state['devices'])}
+            monitor.count[:n_devices] = state['count']
+            monitor.mean[:n_devices] = state['mean']
+            monitor.var[:n_devices] = state['var']
+        return monitor
+
+
+def windows_until_flagged(monitor, device, healthy_features, drifted_features, healthy_windows):
+    """
+    Alimenta healthy_windows janelas normais (repetindo healthy_features) e depois as janelas do
+    sensor remontado. Retorna quantas janelas depois da remontagem o dispositivo foi sinalizado (None = não foi).
+    """
+    for i in range(healthy_windows):
+        monitor.update(device, healthy_features[i % len(healthy_features)])
+    for i in range(10 * len(drifted_features) + 10 * (monitor.half_life_windows or healthy_windows)):
+        monitor.update(device, drifted_features[i % len(drifted_features)])
+        if any(flagged == device for flagged, _, _ in monitor.drifting_devices()):
+            return i + 1
+    return None
+
+
+def main():
+    from alert_policy_replay import RAW_LOGS, load_stream, extract_window_features
+
+    print("--- Monitor de Deriva dos Sensores ---")
+    try:
+        with open(SCALER_FILE_PATH, 'rb') as f_scaler:
+            scaler = pickle.load(f_scaler)
+    except FileNotFoundError:
+        print(f"ERRO: Scaler não encontrado: {SCALER_FILE_PATH}")
+        print("Certifique-se de que o script 'train_model.py' foi executado com sucesso.")
+        return
+
+    monitor = DriftMonitor.from_scaler(scaler)
+    window_size = 50 # Mesmo tamanho de janela do firmware/treinamento
+    stream_features = {}
+
+    # Cada log bruto é tratado como um dispositivo. Um dispositivo extra simula o mesmo sensor
+    # montado em outra orientação (gravidade no eixo Z em vez do X).
+    for filename, label in RAW_LOGS:
+        try:
+            stream = load_stream(filename, label)
+        except FileNotFoundError:
+            print(f"ERRO: Arquivo não encontrado: {filename}")
+            return
+        rotated = stream['accel'][:, [2, 1, 0]] * np.array([1.0, 1.0, -1.0])
+        for device, accel in ((stream['name'], stream['accel']), (stream['name'] + ' (rotacionado)', rotated)):
+            stream_features[device] = extract_window_features(accel, window_size, window_size)
+            for features in stream_features[device]:
+                monitor.update(device, features)
+
+    print(f"\n{len(monitor.device_rows)} dispositivos monitorados. Sinalizados com deriva:")
+    for device, n_windows, worst in monitor.drifting_devices():
+        details = ", ".join(f"{name} {shift:+.1f}σ" for name, shift in worst)
+        print(f"  {device} ({n_windows} janelas): {details}")
+
+    # Remontagem depois de uma semana de operação normal: com e sem esquecimento das janelas antigas
+    healthy_name, _ = RAW_LOGS[0]
+    healthy_device = os.path.basename(healthy_name)
+    print(f"\nSensor remontado após {REMOUNT_HEALTHY_WINDOWS} janelas normais ({healthy_device} -> rotacionado):")
+    for label, half_life in ((f"meia-vida de {HALF_LIFE_WINDOWS} janelas", HALF_LIFE_WINDOWS), ("sem esquecimento", None)):
+        remount = DriftMonitor.from_scaler(scaler, half_life_windows=half_life)
+        started = time.perf_counter()
+        flagged_after = windows_until_flagged(remount, 'esp32_remontado', stream_features[healthy_device],
+                                              stream_features[healthy_device + ' (rotacionado)'], REMOUNT_HEALTHY_WINDOWS)
+        result = 'não sinalizado' if flagged_after is None else f"sinalizado após {flagged_after} janelas"
+        print(f"  {label:<28} {result} ({time.perf_counter() - started:.1f} s de simulação)")
+
+    # Benchmark: muitos dispositivos, uma janela por vez
+    rng = np.random.default_rng(0)
+    bench = DriftMonitor.from_scaler(scaler)
+    windows = rng.normal(scaler.mean_, scaler.scale_, size=(BENCHMARK_WINDOWS_PER_DEVICE, len(scaler.mean_)))
+    device_ids = [f'esp32_{i:04d}' for i in range(BENCHMARK_DEVICES)]
+    started = time.perf_counter()
+    for features in windows:
+        for device in device_ids:
+            bench.update(device, features)
+    update_us = (time.perf_counter() - started) / (BENCHMARK_DEVICES * BENCHMARK_WINDOWS_PER_DEVICE) * 1e6
+
+    started = time.perf_counter()
+    bench.drifting_devices()
+    scan_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    bench.checkpoint(CHECKPOINT_PATH)
+    save_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    restored = DriftMonitor.restore(CHECKPOINT_PATH)
+    load_ms = (time.perf_counter() - started) * 1000
+    consistent = np.array_equal(restored.mean[:BENCHMARK_DEVICES], bench.mean[:BENCHMARK_DEVICES])
+    size_kb = os.path.getsize(CHECKPOINT_PATH) / 1024
+    bytes_per_device = bench.count.itemsize + bench.mean[0].nbytes + bench.var[0].nbytes
+
+    print(f"\nBenchmark com {BENCHMARK_DEVICES} dispositivos x {BENCHMARK_WINDOWS_PER_DEVICE} janelas:")
+    print(f"  Atualização: {update_us:.1f} µs por janela | avaliação de todos os dispositivos: {scan_ms:.2f} ms")
+    print(f"  Memória por dispositivo: {bytes_per_device} bytes")
+    print(f"  Checkpoint: {size_kb:.0f} KB, salvo em {save_ms:.1f} ms, restaurado em {load_ms:.1f} ms "
+          f"({'idêntico' if consistent else 'DIVERGENTE'}) -> {CHECKPOINT_PATH}")
+    print("\nMonitor de deriva concluído.")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import csv
 import os
-import pandas as pd # Usaremos pandas para facilitar a leitura e manipulação dos CSVs
+# pandas (usado para facilitar a leitura e manipulação dos CSVs) é importado dentro das funções,
+# para que importar este módulo (ex: pelo cli.py) seja rápido.
 
 # --- Configurações ---
 INPUT_CSV_NO_TREMOR = 'raw_sensor_log_with_markers_0.csv' # Seu arquivo de NÃO TREMOR
@@ -28,6 +29,7 @@ def process_input_csv(input_filename, label, output_dir_segments):
     Processa um arquivo CSV de entrada, extrai segmentos baseados nos marcadores,
     salva segmentos individualmente e retorna uma lista de dataframes dos segmentos.
     """
+    import pandas as pd
     print(f"\nProcessando arquivo: {input_filename} com rótulo: {label}")
     all_segments_data = [] # Lista para armazenar dataframes de cada segmento deste arquivo
     segment_counter = 0
@@ -94,6 +96,8 @@ def process_input_csv(input_filename, label, output_dir_segments):
     return all_segments_data
 
 def main():
+    import pandas as pd
+
     print("--- Iniciando Script de Extração e Rotulagem de Segmentos ---")
 
     # Garante que os diretórios de saída existam
@@ -1,6 +1,6 @@
-import pandas as pd
-import numpy as np
 import os
+# pandas e numpy são importados dentro das funções que os usam,
+# para que importar este módulo (ex: pelo cli.py) seja rápido.
 
 # --- Configurações ---
 INPUT_LABELED_CSV = 'final_labeled_dataset.csv'
@@ -18,6 +18,7 @@ STEP_SIZE = 25    # Deslocamento para a próxima janela (WINDOW_SIZE para não s
 
 def extract_features_from_window(window_df):
     """Calcula features para uma única janela de dados (um DataFrame)."""
+    import numpy as np # Já carregado por main(); aqui é só uma consulta a sys.modules, desprezível perto das operações da janela
     features = {}
 
     for axis in ['accel_x', 'accel_y', 'accel_z']:
@@ -61,6 +62,8 @@ def extract_features_from_window(window_df):
     return features
 
 def main():
+    import pandas as pd
+
     print("--- Iniciando Script de Extração de Features ---")
 
     try:
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Permite importar alert_server.py e alert_forwarder.py da pasta raiz do projeto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import alert_forwarder
+import alert_server
+
+# --- Configurações ---
+TEST_HOST = '127.0.0.1'
+STUB_PORT = 19090              # Webhook simulado
+ALERT_SERVER_PORT = 18081      # Servidor de alertas local só para o teste
+STUB_LATENCY_SECONDS = 0.02    # Atraso injetado em cada POST recebido pelo webhook
+STUB_FAILURE_RATE = 0.2        # Fração de POSTs respondidos com 500
+STUB_CLOSE_RATE = 0.05         # Fração de respostas que fecham a conexão keep-alive
+THROUGHPUT_ALERTS = 20000      # Alertas enviados direto ao AlertForwarder na fase 1
+SLOW_STUB_LATENCY_SECONDS = 1.0 # Fase 2: webhook lento e instável atrás do /alert
+SERVER_ALERTS = 20
+TEST_BACKOFF_BASE_SECONDS = 0.05 # Backoff menor que o padrão para o teste terminar rápido
+# ---------------------
+
+
+class StubWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Mantém a conexão aberta entre POSTs (keep-alive)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        if random.random() < self.server.failure_rate:
+            status = 500
+        else:
+            status = 200
+            alerts = json.loads(body)["alerts"]
+            with self.server.lock:
+                self.server.posts += 1
+                for alert in alerts:
+                    key = alert["id"] # alert_server.py atribui um id único a cada alerta
+                    self.server.received[key] = self.server.received.get(key, 0) + 1
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        if random.random() < STUB_CLOSE_RATE:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port, latency, failure_rate):
+    stub = ThreadingHTTPServer((TEST_HOST, port), StubWebhookHandler)
+    stub.daemon_threads = True
+    stub.lock = threading.Lock()
+    stub.latency = latency
+    stub.failure_rate = failure_rate
+    stub.posts = 0
+    stub.received = {}
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    return stub
+
+
+def wait_until_settled(forwarder, total, timeout):
+    """Espera até todo alerta ter sido entregue ou descartado."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = forwarder.snapshot()
+        done = stats["forwarded_alerts"] + stats["dropped_failed"] + stats["dropped_overflow"] + stats["dropped_queue_full"]
+        if done >= total:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def throughput_phase():
+    print(f"\nFase 1 - {THROUGHPUT_ALERTS} alertas direto no AlertForwarder "
+          f"(webhook com {STUB_LATENCY_SECONDS * 1000:.0f} ms de atraso, {STUB_FAILURE_RATE:.0%} de falhas):")
+    stub = start_stub(STUB_PORT, STUB_LATENCY_SECONDS, STUB_FAILURE_RATE)
+    forwarder = alert_forwarder.AlertForwarder([f"http://{TEST_HOST}:{STUB_PORT}/alertas"])
+    forwarder.start()
+
+    started = time.perf_counter()
+    submit_times = []
+    for i in range(THROUGHPUT_ALERTS):
+        submit_started = time.perf_counter()
+        forwarder.submit({"id": i, "type": "teste"})
+        submit_times.append(time.perf_counter() - submit_started)
+    settled = wait_until_settled(forwarder, THROUGHPUT_ALERTS, timeout=60)
+    elapsed = time.perf_counter() - started
+    forwarder.stop()
+    stub.shutdown()
+    stub.server_close()
+
+    stats = forwarder.snapshot()
+    delivered = len(stub.received)
+    duplicates = sum(count - 1 for count in stub.received.values())
+    print(f"  submit(): média {sum(submit_times) / len(submit_times) * 1e6:.1f} µs, máx. {max(submit_times) * 1e6:.1f} µs")
+    print(f"  Entregues: {delivered}/{THROUGHPUT_ALERTS} alertas em {elapsed:.2f} s ({delivered / elapsed:.0f} alertas/s)"
+          f"{'' if settled else ' (tempo esgotado)'}")
+    print(f"  POSTs aceitos pelo webhook: {stub.posts} ({delivered / max(stub.posts, 1):.1f} alertas/POST), duplicados: {duplicates}")
+    print(f"  Conexões abertas: {stats['connections_opened']} | lotes reenviados: {stats['retried_batches']} | "
+          f"descartados: {stats['dropped_failed'] + stats['dropped_overflow'] + stats['dropped_queue_full']}")
+
+
+def alert_latency_phase():
+    print(f"\nFase 2 - {SERVER_ALERTS} alertas via /alert com webhook lento "
+          f"({SLOW_STUB_LATENCY_SECONDS * 1000:.0f} ms) e {STUB_FAILURE_RATE:.0%} de falhas:")
+    stub = start_stub(STUB_PORT + 1, SLOW_STUB_LATENCY_SECONDS, STUB_FAILURE_RATE)
+    alert_server.print = lambda *args, **kwargs: None # Silencia o console do servidor durante o teste
+    alert_server.AlertHandler.log_message = lambda self, *args: None
+    alert_server.alert_forwarder = alert_forwarder.AlertForwarder([f"http://{TEST_HOST}:{STUB_PORT + 1}/alertas"])
+    alert_server.alert_forwarder.start()
+    httpd = alert_server.create_server(TEST_HOST, ALERT_SERVER_PORT)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    latencies = []
+    for i in range(SERVER_ALERTS):
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection(TEST_HOST, ALERT_SERVER_PORT, timeout=10)
+        conn.request("GET", f"/alert?type=teste&device=esp32_{i}")
+        conn.getresponse().read()
+        conn.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    alert_server.alert_forwarder.stop(timeout=15)
+    httpd.shutdown()
+    httpd.server_close()
+    stub.shutdown()
+    stub.server_close()
+
+    latencies.sort()
+    print(f"  Latência de /alert: p50 = {latencies[len(latencies) // 2]:.1f} ms, máx. = {latencies[-1]:.1f} ms")
+    print(f"  Contadores de encaminhamento: {alert_server.alert_forwarder.snapshot()}")
+
+
+def main():
+    print("--- Teste do Encaminhamento de Alertas com Webhook Simulado ---")
+    alert_forwarder.BACKOFF_BASE_SECONDS = TEST_BACKOFF_BASE_SECONDS
+    throughput_phase()
+    alert_latency_phase()
+    print("\nTeste de encaminhamento concluído.")
+
+if __name__ == '__main__':
+    main()
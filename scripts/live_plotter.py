@@ -1,6 +1,3 @@
-import serial
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from collections import deque
 import time
 
@@ -19,11 +16,19 @@ accel_z_data = deque(maxlen=MAX_DATA_POINTS)
 # Variável para o tempo inicial
 start_time = time.time()
 
-# Cria a figura e os eixos para o plot
-fig, ax = plt.subplots()
-line_x, = ax.plot([], [], lw=2, label='Accel X')
-line_y, = ax.plot([], [], lw=2, label='Accel Y')
-line_z, = ax.plot([], [], lw=2, label='Accel Z')
+# Figura, eixos e linhas do plot. São criados em create_plot(), chamada por main(),
+# para que importar este módulo não carregue o matplotlib nem abra uma janela.
+fig, ax = None, None
+line_x, line_y, line_z = None, None, None
+
+def create_plot():
+    """Cria a figura e os eixos para o plot."""
+    global fig, ax, line_x, line_y, line_z
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    line_x, = ax.plot([], [], lw=2, label='Accel X')
+    line_y, = ax.plot([], [], lw=2, label='Accel Y')
+    line_z, = ax.plot([], [], lw=2, label='Accel Z')
 
 def init_plot():
     """Inicializa o gráfico."""
@@ -43,8 +48,11 @@ def init_plot():
     # Começando com +/- 20 para melhor visualização de variações menores.
     return line_x, line_y, line_z
 
-def update_plot(frame, ser):
-    """Atualiza os dados do gráfico. Esta função é chamada pela FuncAnimation."""
+def update_plot(frame, ser, serial_exception):
+    """
+    Atualiza os dados do gráfico. Esta função é chamada pela FuncAnimation.
+    serial_exception é serial.SerialException, passada por main() para não importar o pyserial aqui.
+    """
     global start_time
     try:
         if ser.in_waiting > 0:
@@ -86,7 +94,7 @@ def update_plot(frame, ser):
             # else:
                 # print(f"ESP32 (status ou formato inesperado): {line_serial}")
 
-    except serial.SerialException as e:
+    except serial_exception as e:
         print(f"Erro de comunicação serial: {e}")
         # Aqui você pode tentar fechar e reabrir a porta, ou simplesmente parar a animação.
         # Por simplicidade, a animação continuará tentando.
@@ -96,6 +104,10 @@ def update_plot(frame, ser):
     return line_x, line_y, line_z
 
 def main():
+    import serial
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+
     print("--- Live Plotter para MPU6050 ---")
     print(f"Tentando conectar à porta: {SERIAL_PORT} a {BAUD_RATE} baud.")
     print(f"Certifique-se de que o ESP32 está enviando dados (Ax,Ay,Az,Label).")
@@ -112,11 +124,13 @@ def main():
         print("Verifique se a porta está correta e não está sendo usada por outro programa.")
         return
 
+    create_plot()
+
     # Configura a animação
     # O intervalo (interval) é em milissegundos. 20ms = 50Hz. 
     # Ajuste conforme a taxa de envio do ESP32 e a performance desejada.
     # Se o ESP32 envia a 50Hz (delay de 20ms), um intervalo de 20-50ms aqui é razoável.
-    ani = animation.FuncAnimation(fig, update_plot, fargs=(ser,), init_func=init_plot,
+    ani = animation.FuncAnimation(fig, update_plot, fargs=(ser, serial.SerialException), init_func=init_plot,
                                   frames=None, interval=30, blit=True, save_count=MAX_DATA_POINTS)
     
     plt.show() # Mostra o gráfico e inicia o loop de eventos do matplotlib
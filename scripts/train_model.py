@@ -1,12 +1,8 @@
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier # Opcional
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+import os
 import pickle # Para salvar o scaler e o modelo
+from datetime import datetime
+# pandas, numpy e sklearn são importados dentro das funções que os usam,
+# para que importar este módulo (ex: pelo cli.py ou tree_export.py) seja rápido.
 
 # --- Configurações ---
 INPUT_FEATURES_CSV = 'dataset_with_features.csv'
@@ -18,13 +14,16 @@ RANDOM_STATE_SEED = 42  # Para reprodutibilidade
 SCALER_FILE_PATH = 'scaler.pkl'
 MODEL_FILE_PATH = 'trained_model.pkl'
 MODEL_PARAMS_FILE_PATH = 'model_parameters.txt' # Para salvar pesos e bias em formato de texto
+
+# Pasta com o scaler e o modelo já treinados, usada por export_saved_model (cli.py export, executado de scripts/)
+SAVED_MODEL_DIR = os.path.join('..', 'logistic_model_parameters')
 # ---------------------
 
-def print_model_parameters_for_c(model, scaler, model_type, feature_df_for_tree=None):
+def print_model_parameters_for_c(model, scaler, model_type, feature_df_for_tree=None, output_path=MODEL_PARAMS_FILE_PATH):
     """Imprime e salva os parâmetros do modelo e do scaler para fácil implementação em C/C++."""
-    with open(MODEL_PARAMS_FILE_PATH, 'w') as f:
+    with open(output_path, 'w') as f:
         f.write(f"// --- Parâmetros do Modelo ({model_type}) e Scaler para Implementação em C/C++ ---\n")
-        f.write(f"// Gerado em: {pd.Timestamp.now()}\n")
+        f.write(f"// Gerado em: {datetime.now()}\n")
         
         f.write("\n// Parâmetros do StandardScaler (média e escala/desvio_padrão):\n")
         f.write("// Use estes para escalar as features no ESP32 antes da predição\n")
@@ -33,7 +32,7 @@ def print_model_parameters_for_c(model, scaler, model_type, feature_df_for_tree=
         # Assume que feature_df_for_tree.columns tem os nomes se for arvore, senao scaler.feature_names_in_ (se disponivel) ou um placeholder
         feature_names_list = []
         if hasattr(scaler, 'feature_names_in_'):
-            feature_names_list = scaler.feature_names_in_
+            feature_names_list = list(scaler.feature_names_in_)
         elif feature_df_for_tree is not None:
             feature_names_list = list(feature_df_for_tree.columns)
         
@@ -85,22 +84,53 @@ def print_model_parameters_for_c(model, scaler, model_type, feature_df_for_tree=
             print(f"Model Bias: {bias}")
         
         elif model_type == 'decision_tree':
-            f.write("\n// Parâmetros da Árvore de Decisão:\n")
-            f.write("// A exportação direta de uma árvore para C requer uma lógica de if/else.\n")
-            f.write("// Use sklearn.tree.export_text(model, feature_names=...) para ver as regras.\n")
+            f.write("\n// Parâmetros da Árvore de Decisão (arrays paralelos, um elemento por nó):\n")
+            f.write("// Nós internos: próximo nó = tree_children[2*n] se f_scaled[tree_feature[n]] <= tree_threshold[n], senão tree_children[2*n + 1].\n")
+            f.write("// Folhas apontam para si mesmas, então o percurso roda sempre TREE_DEPTH níveis sem if/else.\n")
+            from tree_export import flatten_decision_tree, format_flat_tree_for_c
+            flat_tree = flatten_decision_tree(model)
+            f.write(format_flat_tree_for_c(flat_tree))
             from sklearn.tree import export_text
             # Se feature_df_for_tree foi passado e tem nomes de colunas, use-os.
             # Senão, os nomes podem não estar disponíveis para export_text de forma fácil.
-            tree_feature_names = list(feature_df_for_tree.columns) if feature_df_for_tree is not None else None
+            tree_feature_names = list(feature_df_for_tree.columns) if feature_df_for_tree is not None else (feature_names_list or None)
             tree_rules = export_text(model, feature_names=tree_feature_names)
+            print(f"\nÁrvore exportada como arrays: {len(flat_tree['feature'])} nós, profundidade {flat_tree['depth']}")
             f.write("\n// Regras da Árvore de Decisão (para referência):\n")
             f.write(tree_rules + "\n")
             print("\nRegras da Árvore de Decisão (para referência):")
             print(tree_rules)
         
-        print(f"\nParâmetros e/ou regras do modelo salvos em texto em: {MODEL_PARAMS_FILE_PATH}")
+        print(f"\nParâmetros e/ou regras do modelo salvos em texto em: {output_path}")
+
+def export_saved_model():
+    """Regenera o arquivo de parâmetros para C a partir do scaler e do modelo já salvos, sem retreinar."""
+    print("--- Exportando Parâmetros do Modelo Salvo ---")
+    try:
+        with open(os.path.join(SAVED_MODEL_DIR, SCALER_FILE_PATH), 'rb') as f_scaler:
+            scaler = pickle.load(f_scaler)
+        with open(os.path.join(SAVED_MODEL_DIR, MODEL_FILE_PATH), 'rb') as f_model:
+            model = pickle.load(f_model)
+    except FileNotFoundError as e:
+        print(f"ERRO: Arquivo não encontrado: {e.filename}")
+        print("Execute o treinamento primeiro (train_model.py) para gerar o scaler e o modelo.")
+        return
+
+    model_types = {'LogisticRegression': 'logistic', 'SVC': 'svm_linear', 'DecisionTreeClassifier': 'decision_tree'}
+    model_type = model_types.get(type(model).__name__)
+    if model_type is None:
+        print(f"ERRO: Tipo de modelo não suportado para exportação: {type(model).__name__}")
+        return
+    print_model_parameters_for_c(model, scaler, model_type, output_path=os.path.join(SAVED_MODEL_DIR, MODEL_PARAMS_FILE_PATH))
 
 def main():
+    import pandas as pd
+    import numpy as np
+    from sklearn.model_selection import train_test_split, cross_val_score
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+
     print(f"--- Iniciando Treinamento do Modelo ({MODEL_CHOICE}) ---")
 
     # 1. Carregar Dados
@@ -153,19 +183,16 @@ def main():
     X_test_scaled = scaler.transform(X_test) # Usa o mesmo scaler treinado no X_train
     print("Features escalonadas usando StandardScaler.")
 
-    # Salva o scaler treinado
-    with open(SCALER_FILE_PATH, 'wb') as f_scaler:
-        pickle.dump(scaler, f_scaler)
-    print(f"Scaler treinado salvo em: {SCALER_FILE_PATH}")
-
     # 4. Escolher e Treinar o Modelo
     if MODEL_CHOICE == 'logistic':
         model = LogisticRegression(solver='liblinear', random_state=RANDOM_STATE_SEED, class_weight='balanced')
     elif MODEL_CHOICE == 'svm_linear':
+        from sklearn.svm import SVC
         model = SVC(kernel='linear', probability=True, random_state=RANDOM_STATE_SEED, class_weight='balanced')
     elif MODEL_CHOICE == 'decision_tree':
         # Para árvores, o escalonamento não é estritamente necessário, mas não prejudica.
         # class_weight='balanced' pode ajudar se as classes forem desbalanceadas.
+        from sklearn.tree import DecisionTreeClassifier
         model = DecisionTreeClassifier(random_state=RANDOM_STATE_SEED, max_depth=5, class_weight='balanced') # max_depth pequeno para embarque
     else:
         print(f"ERRO: Escolha de modelo inválida: {MODEL_CHOICE}. Use 'logistic', 'svm_linear', ou 'decision_tree'.")
@@ -175,11 +202,6 @@ def main():
     model.fit(X_train_scaled, y_train)
     print("Modelo treinado.")
 
-    # Salva o modelo treinado
-    with open(MODEL_FILE_PATH, 'wb') as f_model:
-        pickle.dump(model, f_model)
-    print(f"Modelo treinado salvo em: {MODEL_FILE_PATH}")
-
     # 5. Avaliação no Conjunto de Teste
     print("\n--- Avaliação no Conjunto de Teste ---")
     y_pred_test = model.predict(X_test_scaled)
@@ -198,6 +220,25 @@ def main():
     print("\nRelatório de Classificação (Teste):")
     print(classification_report(y_test, y_pred_test, target_names=['NaoTremor (0)', 'Tremor (1)']))
 
+    if MODEL_CHOICE == 'decision_tree':
+        # Confere se a árvore achatada (a mesma lógica exportada para C) reproduz o model.predict
+        from tree_export import flatten_decision_tree, verify_flat_tree
+        numpy_mismatches, c_mismatches = verify_flat_tree(model, flatten_decision_tree(model), X_test_scaled)
+        print(f"Verificação da árvore exportada no conjunto de teste, divergências em relação a model.predict: "
+              f"NumPy {numpy_mismatches} | C compilado {'(compilador não encontrado)' if c_mismatches is None else c_mismatches}")
+        if numpy_mismatches or c_mismatches:
+            print("ERRO: A árvore exportada não reproduz o modelo treinado. O scaler, o modelo e os parâmetros para C não serão salvos.")
+            return
+
+    # Salva o scaler e o modelo treinados (só depois da verificação acima, para que 'cli.py export'
+    # nunca encontre um modelo reprovado)
+    with open(SCALER_FILE_PATH, 'wb') as f_scaler:
+        pickle.dump(scaler, f_scaler)
+    print(f"\nScaler treinado salvo em: {SCALER_FILE_PATH}")
+    with open(MODEL_FILE_PATH, 'wb') as f_model:
+        pickle.dump(model, f_model)
+    print(f"Modelo treinado salvo em: {MODEL_FILE_PATH}")
+
     # 6. Validação Cruzada (no conjunto de treino completo para uma avaliação mais robusta da generalização do modelo)
     print("\n--- Validação Cruzada (no conjunto de treino escalonado) ---")
     # Recria o scaler e escala o X completo para validação cruzada, ou usa X_train_scaled e y_train
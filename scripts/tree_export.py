@@ -0,0 +1,214 @@
+import os
+import time
+import ctypes
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+
+# --- Configurações ---
+BENCHMARK_WINDOWS = 200000  # Número de janelas usadas no benchmark (o conjunto de teste é repetido)
+BENCHMARK_REPEATS = 5       # Repetições de cada medição (usa-se o menor tempo)
+C_COMPILER = 'cc'           # Compilador usado para conferir o código C gerado
+C_COMPILER_FLAGS = ['-O2', '-shared', '-fPIC']
+# ---------------------
+
+
+def flatten_decision_tree(model):
+    """
+    Converte uma DecisionTreeClassifier treinada em arrays paralelos.
+    Folhas apontam para si mesmas (left = right = nó) com feature 0, para que o percurso
+    possa rodar um número fixo de níveis (max_depth) sem desvios condicionais.
+    'children' intercala os filhos (2*nó = esquerda, 2*nó + 1 = direita): o próximo nó é
+    escolhido por índice, children[2*nó + (x > limiar)], em vez de um if/else.
+    """
+    tree = model.tree_
+    is_leaf = tree.children_left == -1
+    node_ids = np.arange(tree.node_count)
+
+    # O sklearn compara float32(x) <= threshold (double). Usando o maior float32 <= threshold,
+    # a comparação em float no ESP32 dá exatamente o mesmo resultado.
+    threshold = tree.threshold.astype(np.float32)
+    rounded_up = threshold.astype(np.float64) > tree.threshold
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+    left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int16)
+    right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int16)
+    return {
+        'feature': np.where(is_leaf, 0, tree.feature).astype(np.int16),
+        'threshold': np.where(is_leaf, np.float32(0), threshold).astype(np.float32),
+        'left': left,
+        'right': right,
+        'children': np.column_stack([left, right]).ravel(),
+        'leaf_value': model.classes_[np.argmax(tree.value[:, 0, :], axis=1)].astype(np.int16),
+        'depth': int(tree.max_depth),
+    }
+
+
+def predict_flat_tree(flat_tree, X):
+    """Avalia todas as janelas de uma vez, descendo a árvore nível por nível."""
+    X = np.asarray(X, dtype=np.float32)
+    rows = np.arange(len(X))
+    nodes = np.zeros(len(X), dtype=np.intp)
+    for _ in range(flat_tree['depth']):
+        go_left = X[rows, flat_tree['feature'][nodes]] <= flat_tree['threshold'][nodes]
+        nodes = flat_tree['children'][2 * nodes + ~go_left]
+    return flat_tree['leaf_value'][nodes]
+
+
+def format_c_float(value):
+    """Literal float em C com precisão suficiente para reproduzir exatamente o float32."""
+    text = f"{float(value):.9g}"
+    if '.' not in text and 'e' not in text:
+        text += ".0"
+    return text + "f"
+
+
+def format_c_array(c_type, name, values, fmt):
+    """Formata um array como declaração C, no mesmo estilo de model_parameters.txt."""
+    return f"const {c_type} {name}[] = {{" + ", ".join(fmt(v) for v in values) + "};\n"
+
+
+def format_flat_tree_for_c(flat_tree):
+    """Gera os arrays da árvore e a função de predição em C (percurso por array, sem if/else)."""
+    node_count = len(flat_tree['feature'])
+    lines = [
+        f"const int TREE_NODE_COUNT = {node_count};\n",
+        f"const int TREE_DEPTH = {flat_tree['depth']};\n",
+        format_c_array("int16_t", "tree_feature", flat_tree['feature'], lambda v: f"{v}"),
+        format_c_array("float", "tree_threshold", flat_tree['threshold'], format_c_float),
+        format_c_array("int16_t", "tree_children", flat_tree['children'], lambda v: f"{v}"),
+        format_c_array("int16_t", "tree_leaf_value", flat_tree['leaf_value'], lambda v: f"{v}"),
+        "\n",
+        "// Recebe as features já escalonadas (mesma ordem do scaler) e retorna a classe prevista.\n",
+        "int perform_tree_prediction(const float* features_scaled) {\n",
+        "    int node = 0;\n",
+        "    for (int level = 0; level < TREE_DEPTH; level++) {\n",
+        "        int go_left = features_scaled[tree_feature[node]] <= tree_threshold[node];\n",
+        "        node = tree_children[2 * node + !go_left];\n",
+        "    }\n",
+        "    return tree_leaf_value[node];\n",
+        "}\n",
+    ]
+    return "".join(lines)
+
+
+def compile_c_predictor(flat_tree):
+    """
+    Compila o código C de format_flat_tree_for_c como biblioteca compartilhada e retorna uma
+    função que pontua uma matriz float32 com perform_tree_prediction. Retorna None se não
+    houver compilador C disponível.
+    """
+    if shutil.which(C_COMPILER) is None:
+        return None
+    source = ("#include <stdint.h>\n\n" + format_flat_tree_for_c(flat_tree) + "\n"
+              "void predict_batch(const float* X, int n_rows, int n_features, int* out) {\n"
+              "    for (int i = 0; i < n_rows; i++) {\n"
+              "        out[i] = perform_tree_prediction(X + (long)i * n_features);\n"
+              "    }\n"
+              "}\n")
+    with tempfile.TemporaryDirectory() as build_dir:
+        source_path = os.path.join(build_dir, 'tree_predictor.c')
+        library_path = os.path.join(build_dir, 'tree_predictor.so')
+        with open(source_path, 'w') as f:
+            f.write(source)
+        subprocess.run([C_COMPILER, *C_COMPILER_FLAGS, '-o', library_path, source_path], check=True, capture_output=True)
+        library = ctypes.CDLL(library_path)
+
+    library.predict_batch.restype = None
+    library.predict_batch.argtypes = [np.ctypeslib.ndpointer(np.float32, flags='C_CONTIGUOUS'), ctypes.c_int, ctypes.c_int,
+                                      np.ctypeslib.ndpointer(np.intc, flags='C_CONTIGUOUS')]
+
+    def predict(X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.intc)
+        library.predict_batch(X, len(X), X.shape[1], out)
+        return out
+    return predict
+
+
+def verify_flat_tree(model, flat_tree, X):
+    """
+    Confere se o avaliador vetorizado e o código C gerado (compilado e executado sobre X em float32)
+    reproduzem exatamente model.predict. Retorna (divergências NumPy, divergências C);
+    as divergências C são None se não houver compilador C.
+    """
+    expected = model.predict(X)
+    numpy_mismatches = int(np.sum(predict_flat_tree(flat_tree, X) != expected))
+    c_predict = compile_c_predictor(flat_tree)
+    c_mismatches = None if c_predict is None else int(np.sum(c_predict(X) != expected))
+    return numpy_mismatches, c_mismatches
+
+
+def best_time_per_window(func, n_windows):
+    """Menor tempo de BENCHMARK_REPEATS execuções, em nanossegundos por janela."""
+    timings = []
+    for _ in range(BENCHMARK_REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) / n_windows * 1e9
+
+
+def main():
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from train_model import INPUT_FEATURES_CSV, TEST_SIZE_RATIO, RANDOM_STATE_SEED
+
+    print("--- Benchmark: Árvore de Decisão Achatada vs. Regressão Logística ---")
+
+    try:
+        df_features = pd.read_csv(INPUT_FEATURES_CSV)
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo de features não encontrado: {INPUT_FEATURES_CSV}")
+        print("Certifique-se de que o script 'feature_extractor.py' foi executado com sucesso.")
+        return
+
+    X = df_features.drop('label', axis=1)
+    y = df_features['label']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE_RATIO, random_state=RANDOM_STATE_SEED, stratify=y)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Mesmos hiperparâmetros de train_model.py
+    tree_model = DecisionTreeClassifier(random_state=RANDOM_STATE_SEED, max_depth=5, class_weight='balanced')
+    tree_model.fit(X_train_scaled, y_train)
+    logistic_model = LogisticRegression(solver='liblinear', random_state=RANDOM_STATE_SEED, class_weight='balanced')
+    logistic_model.fit(X_train_scaled, y_train)
+
+    flat_tree = flatten_decision_tree(tree_model)
+    numpy_mismatches, c_mismatches = verify_flat_tree(tree_model, flat_tree, X_test_scaled)
+    print(f"Árvore: {len(flat_tree['feature'])} nós, profundidade {flat_tree['depth']}")
+    print(f"Verificação no conjunto de teste ({len(X_test_scaled)} janelas), divergências em relação a model.predict:")
+    print(f"  NumPy: {numpy_mismatches} | C compilado: {'compilador não encontrado' if c_mismatches is None else c_mismatches}")
+    if numpy_mismatches or c_mismatches:
+        print("ERRO: A árvore achatada não reproduz a árvore original.")
+        return
+
+    n_repeats = max(1, BENCHMARK_WINDOWS // len(X_test_scaled))
+    X_bench = np.tile(X_test_scaled, (n_repeats, 1))
+    X_bench_f32 = X_bench.astype(np.float32)
+    n_windows = len(X_bench)
+    weights = logistic_model.coef_[0].astype(np.float32)
+    bias = np.float32(logistic_model.intercept_[0])
+
+    results = {
+        'Árvore achatada (NumPy, por nível)': best_time_per_window(lambda: predict_flat_tree(flat_tree, X_bench_f32), n_windows),
+        'Árvore (sklearn model.predict)': best_time_per_window(lambda: tree_model.predict(X_bench), n_windows),
+        'Logística (NumPy, w·x + b e sigmoide)': best_time_per_window(lambda: 1.0 / (1.0 + np.exp(-(X_bench_f32 @ weights + bias))) > 0.5, n_windows),
+        'Logística (sklearn model.predict)': best_time_per_window(lambda: logistic_model.predict(X_bench), n_windows),
+    }
+
+    print(f"\nCusto por janela ({n_windows} janelas, melhor de {BENCHMARK_REPEATS}):")
+    for name, ns_per_window in results.items():
+        print(f"  {name:<40} {ns_per_window:8.1f} ns/janela")
+    print(f"\nOperações por janela no ESP32: árvore = {flat_tree['depth']} comparações; "
+          f"logística = {len(weights)} multiplicações-acumulações + 1 expf.")
+    print("Benchmark concluído.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+import os
+import io
+import json
+import glob
+import time
+import bisect
+import hashlib
+import argparse
+import itertools
+from datetime import datetime, timedelta
+import pandas as pd
+
+# --- Configurações ---
+ARCHIVE_DIR = os.path.join('..', 'data', 'raw_data')         # Pasta com os logs brutos
+ARCHIVE_PATTERN = 'raw_sensor_log_with_markers_*.csv'
+INDEX_SUFFIX = '.idx.json'  # Índice salvo ao lado de cada CSV (ex: raw_sensor_log_with_markers_0.csv.idx.json)
+BLOCK_ROWS = 2048           # Linhas por bloco indexado (blocos menores = leituras menores, índice maior)
+WINDOW_SECONDS = 30         # Janela padrão em torno do alerta (alerta ± WINDOW_SECONDS)
+TIMESTAMP_COLUMN = 'timestamp_pc'
+FINGERPRINT_BYTES = 4096    # Bytes do início do arquivo usados para reconhecer um log regravado
+# ---------------------
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(timestamp):
+    """Converte um timestamp ISO (str/bytes) ou datetime para segundos desde 1970 (sem fuso horário, como nos logs)."""
+    if isinstance(timestamp, bytes):
+        timestamp = timestamp.decode('utf-8')
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.strip())
+    return (timestamp.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+def index_fingerprint(f, blocks):
+    """
+    Hash dos primeiros FINGERPRINT_BYTES do arquivo e dos bytes do último bloco indexado.
+    Se o log só cresceu, esses bytes não mudam; se foi regravado (ex: marker_data_collector.py
+    abre o arquivo com 'w' a cada sessão), o hash muda mesmo que o arquivo novo seja maior.
+    """
+    digest = hashlib.sha1()
+    f.seek(0)
+    digest.update(f.read(FINGERPRINT_BYTES))
+    if blocks:
+        f.seek(blocks[-1][0])
+        digest.update(f.read(blocks[-1][1]))
+    return digest.hexdigest()
+
+
+def build_file_index(csv_path, block_rows=BLOCK_ROWS, previous=None):
+    """
+    Lê o CSV uma vez e registra, para cada bloco de linhas, o offset em bytes, o tamanho
+    e o menor/maior timestamp. Se um índice anterior do mesmo arquivo for passado
+    (log que só cresceu), continua a partir do último bloco em vez de reler tudo.
+    Uma última linha sem '\n' (log ainda sendo gravado) fica fora do índice até ser completada.
+    """
+    stat = os.stat(csv_path) # Antes da leitura: se o log crescer durante ela, a próxima carga estende o índice
+    blocks = []
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        timestamp_pos = header.decode('utf-8').strip().split(',').index(TIMESTAMP_COLUMN)
+        offset = len(header)
+
+        if (previous and previous['blocks'] and previous['header'] == header.decode('utf-8')
+                and previous.get('fingerprint') == index_fingerprint(f, previous['blocks'])):
+            # O último bloco pode estar incompleto; ele é descartado e reindexado
+            blocks = previous['blocks'][:-1]
+            offset = previous['blocks'][-1][0]
+        f.seek(offset)
+
+        block_start, rows, t_min, t_max = offset, 0, None, None
+        for line in f:
+            if not line.endswith(b'\n'):
+                break # Linha ainda sendo gravada
+            offset += len(line)
+            if not line.strip():
+                continue
+            # Timestamps ISO de mesmo formato podem ser comparados como bytes, sem conversão
+            timestamp = line.split(b',', timestamp_pos + 1)[timestamp_pos]
+            if t_min is None or timestamp < t_min:
+                t_min = timestamp
+            if t_max is None or timestamp > t_max:
+                t_max = timestamp
+            rows += 1
+            if rows == block_rows:
+                blocks.append([block_start, offset - block_start, rows, to_seconds(t_min), to_seconds(t_max)])
+                block_start, rows, t_min, t_max = offset, 0, None, None
+        if rows:
+            blocks.append([block_start, offset - block_start, rows, to_seconds(t_min), to_seconds(t_max)])
+        fingerprint = index_fingerprint(f, blocks)
+
+    return {
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+        'block_rows': block_rows,
+        'header': header.decode('utf-8'),
+        'fingerprint': fingerprint,
+        'blocks': blocks,
+    }
+
+
+def load_or_build_file_index(csv_path, block_rows=BLOCK_ROWS):
+    """Carrega o índice salvo se ainda for válido; senão reconstrói (ou estende, se o log apenas cresceu)."""
+    index_path = csv_path + INDEX_SUFFIX
+    stat = os.stat(csv_path)
+    previous = None
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            previous = json.load(f)
+        if previous.get('block_rows') != block_rows:
+            previous = None
+        elif previous['source_size'] == stat.st_size and previous['source_mtime'] == stat.st_mtime:
+            return previous
+        elif previous['source_size'] >= stat.st_size:
+            previous = None # Arquivo foi reescrito (mesmo tamanho ou menor): reindexa do início
+
+    file_index = build_file_index(csv_path, block_rows, previous)
+    with open(index_path, 'w') as f:
+        json.dump(file_index, f)
+    return file_index
+
+
+class WaveformArchive:
+    """
+    Índice temporal esparso sobre um conjunto de logs brutos (um arquivo por dispositivo/gravação).
+    As consultas fazem busca binária no índice e leem do disco apenas os blocos necessários.
+    O índice de cada arquivo só é carregado (ou construído) na primeira consulta a ele, então
+    consultar um dispositivo não depende do tamanho do resto do arquivo de logs.
+    """
+
+    def __init__(self, csv_paths, block_rows=BLOCK_ROWS):
+        self.block_rows = block_rows
+        self.paths = {os.path.splitext(os.path.basename(csv_path))[0]: csv_path for csv_path in sorted(csv_paths)}
+        self.files = {}
+
+    def _entry(self, device):
+        entry = self.files.get(device)
+        if entry is None:
+            csv_path = self.paths[device]
+            file_index = load_or_build_file_index(csv_path, self.block_rows)
+            blocks = file_index['blocks']
+            # Máximo acumulado de t_max (crescente) e mínimo acumulado de t_min a partir do fim (crescente):
+            # permitem achar por bisect o intervalo de blocos candidatos mesmo com pequenas inversões de tempo.
+            prefix_max = list(itertools.accumulate((block[4] for block in blocks), max))
+            suffix_min = list(itertools.accumulate((block[3] for block in reversed(blocks)), min))[::-1]
+            entry = self.files[device] = {
+                'path': csv_path,
+                'header': file_index['header'].encode('utf-8'),
+                'blocks': blocks,
+                'prefix_max': prefix_max,
+                'suffix_min': suffix_min,
+            }
+        return entry
+
+    @classmethod
+    def from_directory(cls, directory=None, pattern=None, block_rows=BLOCK_ROWS):
+        directory = directory if directory is not None else ARCHIVE_DIR
+        pattern = pattern if pattern is not None else ARCHIVE_PATTERN
+        return cls(glob.glob(os.path.join(directory, pattern)), block_rows)
+
+    @property
+    def devices(self):
+        return list(self.paths)
+
+    def candidate_blocks(self, device, start_s, end_s):
+        """Blocos do dispositivo que podem conter amostras em [start_s, end_s]."""
+        entry = self._entry(device)
+        first = bisect.bisect_left(entry['prefix_max'], start_s)
+        last = bisect.bisect_right(entry['suffix_min'], end_s)
+        return [block for block in entry['blocks'][first:last] if block[3] <= end_s and block[4] >= start_s]
+
+    def query(self, start, end, devices=None):
+        """
+        Retorna um DataFrame com as amostras entre start e end (inclusive) dos dispositivos pedidos
+        (todos, se devices for None), com uma coluna 'device' indicando a origem.
+        """
+        start_s, end_s = to_seconds(start), to_seconds(end)
+        start_dt, end_dt = EPOCH + timedelta(seconds=start_s), EPOCH + timedelta(seconds=end_s)
+        frames = []
+        for device in (devices if devices is not None else self.devices):
+            if device not in self.paths:
+                print(f"Aviso: dispositivo '{device}' não encontrado no arquivo de logs.")
+                continue
+            blocks = self.candidate_blocks(device, start_s, end_s)
+            entry = self.files[device]
+            if not blocks:
+                continue
+            chunks = [entry['header']]
+            with open(entry['path'], 'rb') as f:
+                for block in blocks:
+                    f.seek(block[0])
+                    chunks.append(f.read(block[1]))
+            df = pd.read_csv(io.BytesIO(b''.join(chunks)))
+            timestamps = pd.to_datetime(df[TIMESTAMP_COLUMN], format='ISO8601')
+            df = df[(timestamps >= start_dt) & (timestamps <= end_dt)]
+            df.insert(0, 'device', device)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=['device'])
+        return pd.concat(frames, ignore_index=True)
+
+    def around(self, alert_time, seconds=WINDOW_SECONDS, devices=None):
+        """Amostras de alert_time - seconds até alert_time + seconds."""
+        center = EPOCH + timedelta(seconds=to_seconds(alert_time))
+        return self.query(center - timedelta(seconds=seconds), center + timedelta(seconds=seconds), devices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recupera o sinal bruto do acelerômetro em torno de um alerta.")
+    parser.add_argument('alert_time', help="Horário do alerta (ISO, ex: 2025-06-04T19:23:00)")
+    parser.add_argument('--seconds', type=float, default=WINDOW_SECONDS, help="Segundos antes e depois do alerta")
+    parser.add_argument('--device', action='append', help="Dispositivo/arquivo (sem .csv); pode ser repetido. Padrão: todos")
+    parser.add_argument('--output', help="CSV de saída (opcional)")
+    args = parser.parse_args()
+
+    print("--- Recuperação de Sinal em Torno de Alerta ---")
+    started = time.perf_counter()
+    archive = WaveformArchive.from_directory()
+    print(f"Arquivo de logs aberto: {len(archive.devices)} arquivos em {(time.perf_counter() - started) * 1000:.1f} ms")
+    if not archive.devices:
+        print(f"ERRO: Nenhum arquivo '{ARCHIVE_PATTERN}' encontrado em {ARCHIVE_DIR}")
+        return
+
+    try:
+        alert_time = EPOCH + timedelta(seconds=to_seconds(args.alert_time))
+    except ValueError as e:
+        print(f"ERRO: Horário inválido '{args.alert_time}': {e}")
+        return
+    started = time.perf_counter()
+    samples = archive.around(alert_time, args.seconds, args.device)
+    print(f"{len(samples)} amostras encontradas em {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.output:
+        samples.to_csv(args.output, index=False)
+        print(f"Amostras salvas em: {args.output}")
+    elif not samples.empty:
+        print(samples.to_string(max_rows=20))
+
+if __name__ == '__main__':
+    main()